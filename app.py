@@ -1,125 +1,109 @@
 from flask import (
-    Flask, render_template, request,
-    redirect, url_for, flash, session
+    Blueprint, Flask, render_template, request,
+    redirect, url_for, flash, session,
+    stream_template, jsonify, abort
 )
-from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask.cli import with_appcontext
 from functools import wraps
-from datetime import datetime
+import math
+import random
 
-# =======================
-# App Config
-# =======================
+import click
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'change-this-secret'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///quiz.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+import metrics
+from models import (
+    db, configure_database, init_schema,
+    User, Question, QuizAttempt, QuizAnswer, UserProgress, QuizSession,
+    QuestionStats
+)
+from catalog import catalog, init_app as init_catalog
+from search import search_questions
+from write_behind import write_behind, new_submission
+from progress import (
+    current_epoch, record_progress, parse_history_cursor, history_page,
+    compact_progress, record_question_stats, DIFFICULTY_BUCKETS
+)
 
-db = SQLAlchemy(app)
+bp = Blueprint('main', __name__)
 
 # =======================
-# Models
+# App Factory
 # =======================
 
-class User(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
-
-    attempts = db.relationship('QuizAttempt', backref='user', lazy=True)
+def create_app(config=None):
+    """Build the web app. Cheap: the database is not touched here.
 
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+    The schema is created or migrated separately, once per deploy, with
+    `flask --app app init-db`.
+    """
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'change-this-secret'
+    if config:
+        app.config.update(config)
 
-    def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+    configure_database(app)
+    metrics.init_app(app)
+    init_catalog(app)
+    write_behind.init_app(app)
+    app.register_blueprint(bp)
 
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(compact_progress_command)
+    return app
 
-class Question(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    subject = db.Column(db.String(50), nullable=False)
-    level = db.Column(db.String(20), nullable=False)
-    number = db.Column(db.Integer, nullable=False)
-    question_text = db.Column(db.Text, nullable=False)
-    option_a = db.Column(db.String(255), nullable=False)
-    option_b = db.Column(db.String(255), nullable=False)
-    option_c = db.Column(db.String(255), nullable=False)
-    option_d = db.Column(db.String(255), nullable=False)
-    correct_option = db.Column(db.String(10), nullable=False)
-    explanation = db.Column(db.Text)
-
-
-class QuizAttempt(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    subject = db.Column(db.String(50), nullable=False)
-    level = db.Column(db.String(20), nullable=False)
-    score = db.Column(db.Integer, nullable=False)
-    total_questions = db.Column(db.Integer, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+# =======================
+# CLI Commands
+# =======================
 
-    answers = db.relationship('QuizAnswer', backref='attempt', lazy=True)
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create or upgrade the database schema."""
+    init_schema()
+    print("✅ Database schema is up to date")
 
 
-class QuizAnswer(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    attempt_id = db.Column(db.Integer, db.ForeignKey('quiz_attempt.id'), nullable=False)
-    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
-    chosen_option = db.Column(db.String(1))
-    is_correct = db.Column(db.Boolean, default=False)
+@click.command('compact-progress')
+@with_appcontext
+def compact_progress_command():
+    """Delete quiz history from reset (old-epoch) progress."""
+    removed = compact_progress()
+    print(f"🧹 Purged {removed} stale attempts")
 
 # =======================
 # Login Required
 # =======================
 
-# from app import app, db, Question
-
-# with app.app_context():
-#     Question.query.filter_by(subject="Linux", level="Easy").delete()
-#     db.session.commit()
-
-print("✅ Linux Easy questions deleted")
-
-
-
 def login_required(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
         if 'user_id' not in session:
             flash("Please login first.", "warning")
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         return f(*args, **kwargs)
     return wrapper
 
-# =======================
-# DB Init
-# =======================
-
-with app.app_context():
-    db.create_all()
-
 # =======================
 # Auth Routes
 # =======================
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
         user = User(
             username=request.form['username'].strip(),
             email=request.form['email'].strip()
         )
-        user.set_password(request.form['password'])
+        with metrics.track('password_hash'):
+            user.set_password(request.form['password'])
         db.session.add(user)
         db.session.commit()
         flash("Account created!", "success")
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     return render_template('register.html')
 
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         user = User.query.filter(
@@ -127,48 +111,182 @@ def login():
             (User.email == request.form['username_or_email'])
         ).first()
 
-        if user and user.check_password(request.form['password']):
+        with metrics.track('password_hash'):
+            valid = user is not None and user.check_password(request.form['password'])
+
+        if valid:
             session['user_id'] = user.id
             flash("Login successful!", "success")
-            return redirect(url_for('dashboard'))
+            return redirect(url_for('main.dashboard'))
 
         flash("Invalid credentials", "danger")
     return render_template('login.html')
 
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     session.clear()
-    return redirect(url_for('login'))
+    return redirect(url_for('main.login'))
 
 # =======================
 # Dashboard
 # =======================
 
-@app.route('/')
+@bp.route('/')
 @login_required
 def dashboard():
     user_id = session['user_id']
+    epoch = current_epoch(user_id)
 
-    attempts = QuizAttempt.query.filter_by(
-        user_id=user_id
-    ).order_by(QuizAttempt.created_at.desc()).all()
+    progress = UserProgress.query.filter_by(
+        user_id=user_id, epoch=epoch
+    ).order_by(UserProgress.subject, UserProgress.level).all()
 
-    subject_levels = {}
-    rows = db.session.query(Question.subject, Question.level).distinct().all()
-
-    for s, l in rows:
-        subject_levels.setdefault(s, []).append(l)
+    cursor = parse_history_cursor(request.args.get('before'))
+    attempts, next_cursor = history_page(user_id, epoch, cursor)
 
     return render_template(
         'dashboard.html',
+        progress=progress,
         attempts=attempts,
-        subject_levels=subject_levels
+        next_cursor=next_cursor,
+        is_first_page=cursor is None,
+        subject_levels=catalog.subject_levels()
     )
 
 # =======================
 # Quiz
-@app.route('/quiz', methods=['GET', 'POST'])
+# =======================
+
+def _unsolved_query(user_id, subject, level):
+    """Ids of the (subject, level) questions the user hasn't answered yet.
+
+    Solved question ids stay on the database side: the subquery is
+    evaluated once via ix_quiz_attempt_user_epoch_created and the covering
+    ix_quiz_answer_attempt_question index, so its cost no longer depends
+    on shipping the user's whole history as bound params.
+    """
+    return db.session.query(Question.id).filter_by(
+        subject=subject, level=level
+    ).filter(~Question.id.in_(_solved_ids(user_id)))
+
+
+def _solved_ids(user_id):
+    """Subquery of the question ids the user answered this epoch."""
+    epoch = db.session.query(User.progress_epoch)\
+        .filter_by(id=user_id).scalar_subquery()
+    return (
+        db.session.query(QuizAnswer.question_id)
+        .join(QuizAttempt, QuizAttempt.id == QuizAnswer.attempt_id)
+        .filter(QuizAttempt.user_id == user_id,
+                QuizAttempt.epoch == epoch)
+    )
+
+
+def _random_sample(query, limit):
+    """Pick `limit` random question ids from `query`.
+
+    Only the ids are read (a covering scan of the
+    ux_question_subject_level_number index) and sampled in Python, instead
+    of ORDER BY RANDOM() sorting every full row in the set.
+    """
+    ids = [qid for (qid,) in query.all()]
+    if limit is None:
+        limit = len(ids)
+    return random.sample(ids, min(limit, len(ids)))
+
+
+# chance of answering correctly that adaptive quizzes aim for
+TARGET_SUCCESS = 0.7
+
+
+def _logit(p):
+    return math.log(p / (1 - p))
+
+
+def _target_difficulty(user_id, subject, level):
+    """Failure rate (0-1) of the questions to serve the user next.
+
+    Uses a one-parameter logistic model: a question everyone misses with
+    rate f has difficulty logit(f), and the user's skill is how much
+    better than that they did on the rated questions they answered in
+    this bank (their smoothed success rate against the mean failure rate
+    of those questions). The target is the failure rate at which someone
+    of that skill succeeds TARGET_SUCCESS of the time, so stronger users
+    get harder questions; it is not their own miss rate, which would
+    just keep serving them their current level. With no rated history
+    the user counts as average.
+    """
+    answered, correct, mean_failure = db.session.query(
+        db.func.count(QuizAnswer.id),
+        db.func.sum(db.cast(QuizAnswer.is_correct, db.Integer)),
+        db.func.avg(
+            1.0 * (QuestionStats.times_served - QuestionStats.times_correct)
+            / QuestionStats.times_served
+        )
+    ).join(
+        QuizAttempt, QuizAttempt.id == QuizAnswer.attempt_id
+    ).join(
+        QuestionStats, QuestionStats.question_id == QuizAnswer.question_id
+    ).filter(
+        QuizAttempt.user_id == user_id,
+        QuizAttempt.epoch == current_epoch(user_id),
+        QuizAttempt.subject == subject,
+        QuizAttempt.level == level,
+        QuestionStats.difficulty_bucket.isnot(None)
+    ).one()
+
+    skill = 0.0
+    if answered:
+        # smoothed, so a perfect or empty record stays finite
+        success = (correct + 1) / (answered + 2)
+        failure = (mean_failure * answered + 1) / (answered + 2)
+        skill = _logit(success) + _logit(failure)
+
+    return 1 / (1 + math.exp(_logit(TARGET_SUCCESS) - skill))
+
+
+def _adaptive_sample(user_id, subject, level, limit, target):
+    """Pick unsolved questions whose difficulty is nearest `target` (0-1).
+
+    Walks the difficulty buckets outwards from the target one, each step
+    an ix_question_stats_bucket seek, and stops as soon as `limit` ids are
+    found (limit=None takes them all, nearest buckets first). Questions
+    not rated yet make up any shortfall.
+    """
+    target_bucket = min(DIFFICULTY_BUCKETS - 1, int(target * DIFFICULTY_BUCKETS))
+    solved_ids = _solved_ids(user_id)
+    picked = []
+
+    for distance in range(DIFFICULTY_BUCKETS):
+        buckets = {
+            b for b in (target_bucket - distance, target_bucket + distance)
+            if 0 <= b < DIFFICULTY_BUCKETS
+        }
+        if not buckets:
+            break
+
+        query = db.session.query(QuestionStats.question_id).filter(
+            QuestionStats.subject == subject,
+            QuestionStats.level == level,
+            QuestionStats.difficulty_bucket.in_(buckets),
+            ~QuestionStats.question_id.in_(solved_ids)
+        )
+        remaining = None if limit is None else limit - len(picked)
+        picked += _random_sample(query, remaining)
+        if limit is not None and len(picked) >= limit:
+            return picked
+
+    # every rated question is in `picked` by now; the rest are unrated
+    unrated = _unsolved_query(user_id, subject, level).outerjoin(
+        QuestionStats, QuestionStats.question_id == Question.id
+    ).filter(QuestionStats.difficulty_bucket.is_(None))
+    remaining = None if limit is None else limit - len(picked)
+    picked += _random_sample(unrated, remaining)
+    return picked
+
+
+@bp.route('/quiz', methods=['GET', 'POST'])
 @login_required
 def quiz():
 
@@ -176,30 +294,44 @@ def quiz():
     if request.method == 'GET':
         subject = request.args.get('subject')
         level = request.args.get('level')
-        limit = request.args.get('limit', type=int, default=0)
+        # negative means "no limit", as SQLite's LIMIT -1 does
+        limit = max(request.args.get('limit', type=int, default=0), 0)
+        order = request.args.get('order', 'random')
 
         user_id = session['user_id']
 
-        # all solved question ids for this user
-        solved_ids = (
-            db.session.query(QuizAnswer.question_id)
-            .join(QuizAttempt, QuizAttempt.id == QuizAnswer.attempt_id)
-            .filter(QuizAttempt.user_id == user_id)
-            .distinct()
-            .all()
-        )
-        solved_ids = [qid for (qid,) in solved_ids]
-
-        query = Question.query.filter_by(subject=subject, level=level)
-
-        if solved_ids:
-            query = query.filter(~Question.id.in_(solved_ids))
-
-        questions = query.limit(limit).all() if limit else query.all()
+        query = _unsolved_query(user_id, subject, level)
+
+        if order == 'adaptive':
+            target = request.args.get('difficulty', type=float)
+            if target is None:
+                target = _target_difficulty(user_id, subject, level)
+            elif not math.isfinite(target):
+                abort(400)
+            ids = _adaptive_sample(
+                user_id, subject, level, limit or None,
+                min(max(target, 0.0), 1.0)
+            )
+        elif limit and order == 'random':
+            ids = _random_sample(query, limit)
+        elif limit:
+            ids = [qid for (qid,) in query.order_by(Question.id).limit(limit)]
+        else:
+            ids = [qid for (qid,) in query.order_by(Question.id)]
+            if order == 'random':
+                random.shuffle(ids)
+
+        # hydrate from the in-memory catalog instead of the ORM
+        cached = catalog.get_many(ids)
+        questions = [cached[qid] for qid in ids if qid in cached]
 
         if not questions:
             flash("🎉 You have solved all available questions!", "success")
-            return redirect(url_for('dashboard'))
+            return redirect(url_for('main.dashboard'))
+
+        # "All": serve the bank in chunks instead of one huge page
+        if not limit:
+            return _start_quiz_session(user_id, subject, level, questions)
 
         return render_template(
             'quiz.html',
@@ -216,28 +348,23 @@ def quiz():
     # 🔴 SAFETY CHECK
     if not qid_string:
         flash("Invalid quiz submission.", "danger")
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
 
-    question_ids = qid_string.split(',')
+    question_ids = [
+        int(qid) for qid in qid_string.split(',') if qid.strip().isdigit()
+    ]
 
     user_id = session['user_id']
     score = 0
     total = len(question_ids)
 
-    attempt = QuizAttempt(
-        user_id=user_id,
-        subject=subject,
-        level=level,
-        score=0,
-        total_questions=total
-    )
-    db.session.add(attempt)
-    db.session.commit()
+    # every submitted question comes from the in-memory catalog
+    questions = catalog.get_many(question_ids)
 
     results = []
 
     for qid in question_ids:
-        q = Question.query.get(int(qid))
+        q = questions.get(qid)
         if not q:
             continue
 
@@ -245,34 +372,28 @@ def quiz():
         if not chosen:
             continue
 
-        correct = q.correct_option.strip().upper()[0]
-        is_correct = chosen.upper() == correct
+        is_correct = chosen.upper() == q.correct
 
         if is_correct:
             score += 1
 
-        db.session.add(
-            QuizAnswer(
-                attempt_id=attempt.id,
-                question_id=q.id,
-                chosen_option=chosen,
-                is_correct=is_correct
-            )
-        )
-
         results.append({
             "question": q,
             "chosen": chosen,
             "is_correct": is_correct
         })
 
-    attempt.score = score
-    db.session.commit()
+    # attempt, answers and rollups in a single transaction; with
+    # WRITE_BEHIND=1 that happens after the result page is rendered
+    write_behind.submit(new_submission(
+        user_id, current_epoch(user_id), subject, level, score, total,
+        [(r["question"].id, r["chosen"], r["is_correct"]) for r in results]
+    ))
 
     # 🔴 SAFETY CHECK
     if not results:
         flash("No answers were submitted.", "warning")
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
 
     return render_template(
         'result.html',
@@ -284,31 +405,278 @@ def quiz():
     )
 
 
+# =======================
+# Paged Quiz Sessions
+# =======================
+
+QUIZ_CHUNK_SIZE = 10
+
+
+def _question_json(q):
+    return {
+        "id": q.id,
+        "question_text": q.question_text,
+        "options": [q.option_a, q.option_b, q.option_c, q.option_d],
+        "correct": q.correct
+    }
+
+
+def _start_quiz_session(user_id, subject, level, questions):
+    """Pin the question order in a quiz_session row and stream page one."""
+    quiz_session = QuizSession(
+        user_id=user_id,
+        epoch=current_epoch(user_id),
+        subject=subject,
+        level=level,
+        question_ids=','.join(str(q.id) for q in questions)
+    )
+    db.session.add(quiz_session)
+    db.session.flush()
+    session_id = quiz_session.id
+    db.session.commit()
+
+    return stream_template(
+        'quiz_paged.html',
+        session_id=session_id,
+        questions=questions[:QUIZ_CHUNK_SIZE],
+        total=len(questions),
+        chunk_size=QUIZ_CHUNK_SIZE,
+        subject=subject,
+        level=level
+    )
+
+
+def _owned_quiz_session(session_id):
+    quiz_session = db.session.get(QuizSession, session_id)
+    if not quiz_session or quiz_session.user_id != session['user_id']:
+        abort(404)
+    return quiz_session
+
+
+def _session_state(quiz_session, total, score):
+    return {
+        "graded": quiz_session.graded,
+        "total": total,
+        "score": score,
+        "done": quiz_session.graded >= total,
+        "result_url": url_for('main.quiz_session_result', session_id=quiz_session.id)
+    }
+
+
+@bp.route('/quiz/session/<int:session_id>/questions')
+@login_required
+def quiz_session_questions(session_id):
+    quiz_session = _owned_quiz_session(session_id)
+    ids = quiz_session.ids()
+
+    offset = max(request.args.get('offset', type=int, default=0), 0)
+    chunk = ids[offset:offset + QUIZ_CHUNK_SIZE]
+    cached = catalog.get_many(chunk)
+
+    return jsonify(
+        offset=offset,
+        total=len(ids),
+        questions=[_question_json(cached[qid]) for qid in chunk if qid in cached]
+    )
+
+
+def _attempt_score(quiz_session):
+    if not quiz_session.attempt_id:
+        return 0
+    return db.session.query(QuizAttempt.score)\
+        .filter_by(id=quiz_session.attempt_id).scalar()
+
+
+@bp.route('/quiz/session/<int:session_id>/answers', methods=['POST'])
+@login_required
+def quiz_session_answers(session_id):
+    """Grade one chunk: {"offset": n, "answers": {"<qid>": "A", ...}}."""
+    quiz_session = _owned_quiz_session(session_id)
+    user_id = quiz_session.user_id
+    ids = quiz_session.ids()
+
+    if quiz_session.epoch != current_epoch(user_id):
+        return jsonify(error="Progress was reset; start a new quiz."), 409
+
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify(error="Expected a JSON object."), 400
+    answers = payload.get('answers') or {}
+    offset = payload.get('offset')
+    if not isinstance(answers, dict) or type(offset) is not int or offset < 0:
+        return jsonify(error='Expected {"offset": n, "answers": {...}}.'), 400
+
+    chunk = ids[offset:offset + QUIZ_CHUNK_SIZE]
+
+    # chunks are graded strictly in order: claim this one by moving the
+    # cursor first, so a re-sent (or concurrent duplicate) chunk finds it
+    # already moved and is not graded twice
+    claimed = chunk and QuizSession.query.filter_by(
+        id=session_id, graded=offset
+    ).update(
+        {QuizSession.graded: QuizSession.graded + len(chunk)},
+        synchronize_session=False
+    )
+    if not claimed:
+        db.session.rollback()
+        return jsonify(_session_state(
+            quiz_session, len(ids), _attempt_score(quiz_session)
+        )), 409
+
+    # we hold the write lock now; reload the cursor and attempt id
+    db.session.refresh(quiz_session)
+    questions = catalog.get_many(chunk)
+
+    score = 0
+    answer_rows = []
+
+    for qid in chunk:
+        q = questions.get(qid)
+        chosen = str(answers.get(str(qid)) or '')[:1].upper()
+        if not q or not chosen:
+            continue
+
+        is_correct = chosen == q.correct
+        if is_correct:
+            score += 1
+
+        answer_rows.append({
+            "question_id": q.id,
+            "chosen_option": chosen,
+            "is_correct": is_correct
+        })
+
+    # attempt, answers, session cursor and rollups in a single transaction
+    new_attempt = quiz_session.attempt_id is None
+    if new_attempt:
+        attempt = QuizAttempt(
+            user_id=user_id,
+            epoch=quiz_session.epoch,
+            subject=quiz_session.subject,
+            level=quiz_session.level,
+            score=score,
+            total_questions=len(ids)
+        )
+        db.session.add(attempt)
+        db.session.flush()
+        quiz_session.attempt_id = attempt.id
+        running_score = score
+    else:
+        QuizAttempt.query.filter_by(id=quiz_session.attempt_id).update(
+            {QuizAttempt.score: QuizAttempt.score + score},
+            synchronize_session=False
+        )
+        running_score = _attempt_score(quiz_session)
+
+    if answer_rows:
+        for row in answer_rows:
+            row["attempt_id"] = quiz_session.attempt_id
+        db.session.execute(db.insert(QuizAnswer), answer_rows)
+
+    record_progress(
+        user_id, quiz_session.epoch, quiz_session.subject, quiz_session.level,
+        score, len(answer_rows),
+        new_attempt=new_attempt, best_score=running_score
+    )
+    record_question_stats(
+        (questions[row["question_id"]], row["is_correct"]) for row in answer_rows
+    )
+
+    state = _session_state(quiz_session, len(ids), running_score)
+    db.session.commit()
+
+    return jsonify(state)
+
+
+@bp.route('/quiz/session/<int:session_id>/result')
+@login_required
+def quiz_session_result(session_id):
+    quiz_session = _owned_quiz_session(session_id)
+
+    rows = []
+    if quiz_session.attempt_id:
+        rows = db.session.query(
+            QuizAnswer.question_id,
+            QuizAnswer.chosen_option,
+            QuizAnswer.is_correct
+        ).filter_by(
+            attempt_id=quiz_session.attempt_id
+        ).order_by(QuizAnswer.id).all()
+
+    # 🔴 SAFETY CHECK
+    if not rows:
+        flash("No answers were submitted.", "warning")
+        return redirect(url_for('main.dashboard'))
+
+    questions = catalog.get_many([qid for qid, _, _ in rows])
+    results = [
+        {"question": questions[qid], "chosen": chosen, "is_correct": is_correct}
+        for qid, chosen, is_correct in rows
+        if qid in questions
+    ]
+
+    return render_template(
+        'result.html',
+        subject=quiz_session.subject,
+        level=quiz_session.level,
+        score=sum(1 for r in results if r["is_correct"]),
+        total=len(quiz_session.ids()),
+        results=results
+    )
+
+
+# =======================
+# Search
+# =======================
+
+@bp.route('/search')
+@login_required
+def search():
+    text = request.args.get('q', '').strip()
+    subject = request.args.get('subject') or None
+    level = request.args.get('level') or None
+    page = max(request.args.get('page', type=int, default=1), 1)
+
+    hits, has_next = search_questions(text, subject, level, page)
+    questions = catalog.get_many([hit.id for hit in hits])
+
+    return render_template(
+        'search.html',
+        q=text,
+        subject=subject,
+        level=level,
+        page=page,
+        has_next=has_next,
+        results=[(hit, questions.get(hit.id)) for hit in hits],
+        subject_levels=catalog.subject_levels()
+    )
+
+
 # =======================
 # Reset Progress
 # =======================
 
-@app.route('/reset-progress')
+@bp.route('/reset-progress')
 @login_required
 def reset_progress():
     user_id = session['user_id']
 
-    attempt_ids = db.session.query(QuizAttempt.id)\
-        .filter_by(user_id=user_id).subquery()
-
-    QuizAnswer.query.filter(
-        QuizAnswer.attempt_id.in_(attempt_ids)
-    ).delete(synchronize_session=False)
-
-    QuizAttempt.query.filter_by(user_id=user_id).delete()
+    # O(1): older attempts simply stop counting once the epoch moves on;
+    # `flask compact-progress` purges them later in small batches
+    User.query.filter_by(id=user_id).update(
+        {User.progress_epoch: User.progress_epoch + 1}
+    )
     db.session.commit()
 
     flash("Progress reset!", "success")
-    return redirect(url_for('dashboard'))
+    return redirect(url_for('main.dashboard'))
 
 # =======================
 # Run
 # =======================
 
 if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        init_schema()
     app.run(debug=True)
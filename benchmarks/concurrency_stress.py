@@ -0,0 +1,138 @@
+"""Concurrent quiz submissions from several worker processes.
+
+Each process imports the app against one shared SQLite file (as gunicorn
+workers do), logs in its own user and submits quizzes as fast as it can.
+Any "database is locked" error fails the run.
+
+    python benchmarks/concurrency_stress.py [--workers 8] [--submits 50]
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUESTIONS = 200
+
+
+def _import_app(db_path):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    # keep benchmark traffic out of the real app's /metrics
+    os.environ['METRICS_DIR'] = os.path.join(os.path.dirname(db_path), 'metrics')
+    sys.path.insert(0, ROOT)
+    import app as quiz_app
+    return quiz_app.create_app()
+
+
+def setup(db_path, workers):
+    app = _import_app(db_path)
+    from models import db, init_schema, Question, User
+    from catalog import bump_catalog_version
+
+    with app.app_context():
+        init_schema()
+        db.session.execute(db.insert(Question), [
+            {
+                "subject": "Stress", "level": "Easy", "number": i,
+                "question_text": f"Question {i}?",
+                "option_a": "a", "option_b": "b",
+                "option_c": "c", "option_d": "d",
+                "correct_option": "A", "explanation": ""
+            }
+            for i in range(1, QUESTIONS + 1)
+        ])
+        for w in range(workers):
+            user = User(username=f"stress{w}", email=f"stress{w}@example.com")
+            user.set_password("pw")
+            db.session.add(user)
+        bump_catalog_version()
+        db.session.commit()
+        db.engine.dispose()
+
+
+def worker(args):
+    db_path, index, submits, per_quiz = args
+    client = _import_app(db_path).test_client()
+    client.post('/login', data={
+        'username_or_email': f'stress{index}', 'password': 'pw'
+    })
+
+    errors = []
+    latencies = []
+    for _ in range(submits):
+        # fresh epoch when the bank runs dry, so every submit has questions
+        page = client.get(
+            f'/quiz?subject=Stress&level=Easy&limit={per_quiz}'
+        )
+        if page.status_code == 302:
+            client.get('/reset-progress')
+            page = client.get(
+                f'/quiz?subject=Stress&level=Easy&limit={per_quiz}'
+            )
+        ids = re.search(r'name="question_ids"\s+value="([^"]*)"', page.text)
+        if not ids:
+            errors.append(f"GET /quiz -> {page.status_code}")
+            continue
+
+        form = {'subject': 'Stress', 'level': 'Easy', 'question_ids': ids.group(1)}
+        for qid in ids.group(1).split(','):
+            form[f'q_{qid}'] = 'A'
+
+        started = time.perf_counter()
+        try:
+            response = client.post('/quiz', data=form)
+            if response.status_code != 200:
+                errors.append(f"POST /quiz -> {response.status_code}")
+        except Exception as exc:  # OperationalError: database is locked
+            errors.append(repr(exc))
+        latencies.append(time.perf_counter() - started)
+
+    return errors, latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--submits', type=int, default=50)
+    parser.add_argument('--per-quiz', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'stress.db')
+
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(1) as pool:
+            pool.apply(setup, (db_path, args.workers))
+
+        started = time.perf_counter()
+        with ctx.Pool(args.workers) as pool:
+            results = pool.map(worker, [
+                (db_path, w, args.submits, args.per_quiz)
+                for w in range(args.workers)
+            ])
+        elapsed = time.perf_counter() - started
+
+    errors = [e for errs, _ in results for e in errs]
+    latencies = sorted(l for _, lats in results for l in lats)
+    total = len(latencies)
+
+    print(f"{args.workers} workers x {args.submits} submits: "
+          f"{total} POSTs in {elapsed:.2f}s ({total / elapsed:.0f}/s)")
+    if latencies:
+        p50 = latencies[total // 2] * 1000
+        p99 = latencies[min(total - 1, int(total * 0.99))] * 1000
+        print(f"POST /quiz latency p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+
+    if errors:
+        print(f"❌ {len(errors)} errors, e.g. {errors[0]}")
+        return 1
+    print("✅ no lock errors")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,327 @@
+"""Reproducible load test of the main user flows.
+
+Seeds a temporary SQLite database from the data/*.json banks plus
+synthetic users with long attempt histories, then runs concurrent user
+flows (login -> dashboard -> quiz GET -> quiz POST) against the WSGI app
+from several processes, as gunicorn workers would. Throughput and
+p50/p95/p99 latency per route are printed and written to JSON, so runs
+can be compared across commits.
+
+    python benchmarks/load_bench.py [--users 2000] [--history 40]
+        [--workers 4] [--flows 50] [--seed 1] [-o load.json]
+        [--compare previous.json] [--write-behind]
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PASSWORD = "bench-pw"
+ANSWERS_PER_ATTEMPT = 10
+SEED_BATCH_SIZE = 5000
+
+ROUTES = ("POST /login", "GET /", "GET /quiz", "POST /quiz")
+
+
+def _create_app(db_path, metrics_dir):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['METRICS_DIR'] = metrics_dir
+    os.environ['WRITE_BEHIND_JOURNAL_DIR'] = os.path.join(metrics_dir, 'journal')
+    sys.path.insert(0, ROOT)
+    from app import create_app
+    return create_app()
+
+
+# =======================
+# Seeding
+# =======================
+
+def _insert_batched(db, table, rows):
+    for i in range(0, len(rows), SEED_BATCH_SIZE):
+        db.session.execute(db.insert(table), rows[i:i + SEED_BATCH_SIZE])
+
+
+def seed(db_path, metrics_dir, users, history, seed_value):
+    """Build the benchmark database; returns the (subject, level) pairs."""
+    app = _create_app(db_path, metrics_dir)
+
+    from werkzeug.security import generate_password_hash
+    from models import db, init_schema, User, Question, QuizAttempt, QuizAnswer
+    from progress import rebuild_progress
+    import questions_loader
+
+    rng = random.Random(seed_value)
+
+    with app.app_context():
+        init_schema()
+        with contextlib.redirect_stdout(io.StringIO()):
+            questions_loader.load_questions(
+                os.path.join(ROOT, questions_loader.DATA_DIR), app=app
+            )
+
+        bank = {}
+        for qid, subject, level in db.session.query(
+                Question.id, Question.subject, Question.level):
+            bank.setdefault((subject, level), []).append(qid)
+        pairs = sorted(k for k, v in bank.items() if len(v) >= ANSWERS_PER_ATTEMPT)
+
+        # one real hash shared by every user keeps seeding fast while
+        # login still pays the full verification cost
+        password_hash = generate_password_hash(PASSWORD)
+        _insert_batched(db, User, [
+            {"id": u, "username": f"user{u}", "email": f"user{u}@example.com",
+             "password_hash": password_hash}
+            for u in range(1, users + 1)
+        ])
+
+        now = datetime.utcnow()
+        attempt_id = 0
+        attempts = []
+        answers = []
+
+        for user_id in range(1, users + 1):
+            for _ in range(history):
+                attempt_id += 1
+                subject, level = rng.choice(pairs)
+                picked = rng.sample(bank[(subject, level)], ANSWERS_PER_ATTEMPT)
+                correct = [rng.random() < 0.6 for _ in picked]
+
+                attempts.append({
+                    "id": attempt_id, "user_id": user_id, "epoch": 0,
+                    "subject": subject, "level": level,
+                    "score": sum(correct),
+                    "total_questions": ANSWERS_PER_ATTEMPT,
+                    "created_at": now - timedelta(minutes=rng.randrange(60 * 24 * 365))
+                })
+                answers.extend(
+                    {"attempt_id": attempt_id, "question_id": qid,
+                     "chosen_option": "A" if ok else "B", "is_correct": ok}
+                    for qid, ok in zip(picked, correct)
+                )
+
+            if len(answers) >= SEED_BATCH_SIZE * 10:
+                _insert_batched(db, QuizAttempt, attempts)
+                _insert_batched(db, QuizAnswer, answers)
+                attempts, answers = [], []
+
+        _insert_batched(db, QuizAttempt, attempts)
+        _insert_batched(db, QuizAnswer, answers)
+        rebuild_progress()
+        db.session.commit()
+        db.engine.dispose()
+
+    return pairs
+
+
+# =======================
+# Load
+# =======================
+
+def worker(args):
+    """Run `flows` user flows; returns {route: [seconds, ...]}, errors."""
+    db_path, metrics_dir, index, flows, users, pairs, seed_value = args
+    app = _create_app(db_path, metrics_dir)
+    rng = random.Random(seed_value * 1000 + index)
+
+    timings = {route: [] for route in ROUTES}
+    errors = []
+
+    def timed(route, call, expect):
+        started = time.perf_counter()
+        response = call()
+        elapsed = time.perf_counter() - started
+        if response.status_code not in expect:
+            errors.append(f"{route} -> {response.status_code}")
+        return response, elapsed
+
+    # warm-up flow: loads the question catalog and template cache
+    warm = app.test_client()
+    warm.post('/login', data={'username_or_email': 'user1', 'password': PASSWORD})
+    warm.get('/')
+
+    for flow in range(flows + 1):
+        client = app.test_client()
+        username = f"user{rng.randint(1, users)}"
+        subject, level = rng.choice(pairs)
+        samples = {}
+
+        _, samples["POST /login"] = timed("POST /login", lambda: client.post(
+            '/login',
+            data={'username_or_email': username, 'password': PASSWORD}
+        ), (302,))
+        _, samples["GET /"] = timed("GET /", lambda: client.get('/'), (200,))
+
+        page, samples["GET /quiz"] = timed("GET /quiz", lambda: client.get(
+            '/quiz', query_string={
+                'subject': subject, 'level': level, 'limit': ANSWERS_PER_ATTEMPT
+            }
+        ), (200, 302))  # 302: this user already solved the whole bank
+        ids = re.search(r'name="question_ids"\s+value="([^"]*)"', page.text)
+        if ids:
+            form = {'subject': subject, 'level': level, 'question_ids': ids.group(1)}
+            for qid in ids.group(1).split(','):
+                form[f'q_{qid}'] = rng.choice('ABCD')
+            _, samples["POST /quiz"] = timed(
+                "POST /quiz", lambda: client.post('/quiz', data=form), (200,)
+            )
+
+        if flow:  # the first flow only warms this worker up
+            for route, elapsed in samples.items():
+                timings[route].append(elapsed)
+
+    from write_behind import write_behind
+    with app.app_context():
+        drained = write_behind.drain()
+    if not drained:
+        errors.append("write-behind queue did not drain")
+
+    return timings, errors
+
+
+def percentile_ms(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[index] * 1000
+
+
+def summarise(timings, elapsed):
+    routes = {}
+    for route in ROUTES:
+        values = sorted(timings.get(route, []))
+        routes[route] = {
+            "requests": len(values),
+            "throughput_rps": len(values) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile_ms(values, 50),
+            "p95_ms": percentile_ms(values, 95),
+            "p99_ms": percentile_ms(values, 99),
+        }
+    return routes
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    base_routes = (baseline or {}).get("routes", {})
+    print(f"{'route':<12} {'reqs':>6} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+
+    for route, stats in report["routes"].items():
+        if not stats["requests"]:
+            continue
+        line = (f"{route:<12} {stats['requests']:>6} "
+                f"{stats['throughput_rps']:>8.1f} {stats['p50_ms']:>8.1f} "
+                f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}")
+
+        before = base_routes.get(route)
+        if before and before.get("p50_ms"):
+            change = (stats["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100
+            line += f"   p50 {change:+.0f}% vs {baseline.get('commit')}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--history', type=int, default=40,
+                        help='past attempts per user')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--flows', type=int, default=50,
+                        help='user flows per worker')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('-o', '--output', default=None,
+                        help='JSON report (default: load_bench-<commit>.json)')
+    parser.add_argument('--compare', default=None,
+                        help='earlier JSON report to print p50 changes against')
+    parser.add_argument('--write-behind', action='store_true',
+                        help='run the app with WRITE_BEHIND=1')
+    args = parser.parse_args(argv)
+
+    if args.write_behind:
+        os.environ['WRITE_BEHIND'] = '1'
+
+    commit = git_commit()
+    output = args.output or f"load_bench-{commit or 'local'}.json"
+    ctx = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'load.db')
+        metrics_dir = os.path.join(tmp, 'metrics')
+
+        started = time.perf_counter()
+        with ctx.Pool(1) as pool:
+            pairs = pool.apply(seed, (
+                db_path, metrics_dir, args.users, args.history, args.seed
+            ))
+        seed_seconds = time.perf_counter() - started
+        print(f"seeded {args.users} users x {args.history} attempts "
+              f"in {seed_seconds:.1f}s")
+
+        started = time.perf_counter()
+        with ctx.Pool(args.workers) as pool:
+            results = pool.map(worker, [
+                (db_path, metrics_dir, w, args.flows, args.users, pairs, args.seed)
+                for w in range(args.workers)
+            ])
+        elapsed = time.perf_counter() - started
+
+    timings = {route: [] for route in ROUTES}
+    errors = []
+    for worker_timings, worker_errors in results:
+        for route, values in worker_timings.items():
+            timings[route].extend(values)
+        errors.extend(worker_errors)
+
+    report = {
+        "commit": commit,
+        "created_at": datetime.utcnow().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "params": {
+            "users": args.users, "history": args.history,
+            "workers": args.workers, "flows": args.flows, "seed": args.seed,
+            "write_behind": args.write_behind
+        },
+        "seed_seconds": seed_seconds,
+        "elapsed_seconds": elapsed,
+        "errors": len(errors),
+        "routes": summarise(timings, elapsed),
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print_report(report, baseline)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 wrote {output}")
+
+    if errors:
+        print(f"❌ {len(errors)} errors, e.g. {errors[0]}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
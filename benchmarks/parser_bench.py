@@ -0,0 +1,173 @@
+"""Throughput of the MCQ tokenizer in files.py against the old parser.
+
+Every data/*.json bank is rendered back into question-bank text
+("question / a) .. d) / Answer: x)"), split into pages, and parsed by
+both. The tokenizer is still a little slower than the old split/findall
+parser, which only finds questions starting "What is/will/does"; the
+"golden" column counts the records the tokenizer recovers exactly.
+Correctness is covered by tests/test_mcq_tokenizer.py.
+
+    python benchmarks/parser_bench.py [--repeat N]
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from files import parse_mcq_stream  # noqa: E402
+
+LINES_PER_PAGE = 45
+
+
+def legacy_parse_mcqs(text):
+    """The regex split/findall parser that parse_mcq_stream replaced."""
+    questions = []
+    blocks = re.split(r"(?=What\s+(?:will|is|does))", text, flags=re.IGNORECASE)
+    for block in blocks:
+        if "Answer:" not in block:
+            continue
+        ans_match = re.search(r"Answer:\s*([a-dA-D])\)", block)
+        if not ans_match:
+            continue
+        options = re.findall(r"[a-dA-D]\)\s*(.+)", block)
+        if len(options) < 4:
+            continue
+        questions.append({
+            "question_text": block.split("a)")[0].strip(),
+            "option_a": options[0].strip(),
+            "option_b": options[1].strip(),
+            "option_c": options[2].strip(),
+            "option_d": options[3].strip(),
+            "correct_option": ans_match.group(1).upper(),
+        })
+    return questions
+
+
+GARBLED_RE = re.compile(r"^\s*Answer\s*[:\-]", re.MULTILINE)
+
+
+def load_fixture(path):
+    """Records from a data/*.json bank, in the option_a..d schema.
+
+    Records whose text already contains an "Answer:" line are debris from
+    an earlier bad extraction and cannot round-trip, so they are left out.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+
+    fixture = []
+    for r in records:
+        if "question" in r and "A" in r:
+            r = {
+                "question_text": r["question"],
+                "option_a": r["A"], "option_b": r["B"],
+                "option_c": r["C"], "option_d": r["D"],
+                "correct_option": r["answer"],
+            }
+        if any(GARBLED_RE.search(str(v)) for v in r.values()):
+            continue
+        fixture.append({
+            "question_text": r.get("question_text", ""),
+            "option_a": r.get("option_a", ""),
+            "option_b": r.get("option_b", ""),
+            "option_c": r.get("option_c", ""),
+            "option_d": r.get("option_d", ""),
+            "correct_option": r.get("correct_option", "A").strip().upper()[:1],
+        })
+    return fixture
+
+
+def render_pages(fixture):
+    """Question-bank text for `fixture`, split into fixed-size pages."""
+    lines = []
+    for r in fixture:
+        lines.extend(r["question_text"].splitlines() or [""])
+        for letter in "abcd":
+            lines.append(f"{letter}) {r['option_' + letter]}")
+        lines.append(f"Answer: {r['correct_option'].lower()})")
+        lines.append("")
+
+    return [
+        "\n".join(lines[i:i + LINES_PER_PAGE])
+        for i in range(0, len(lines), LINES_PER_PAGE)
+    ]
+
+
+def canonical(record):
+    return tuple(
+        " ".join(record[key].split())
+        for key in ("question_text", "option_a", "option_b",
+                    "option_c", "option_d", "correct_option")
+    )
+
+
+def golden_matches(fixture, parsed):
+    expected = [canonical(r) for r in fixture if r["question_text"].strip()]
+    got = [canonical(r) for r in parsed]
+    return sum(1 for e, g in zip(expected, got) if e == g), len(expected)
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, "data"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    total_bytes = 0
+    new_time = legacy_time = 0.0
+    failures = []
+
+    print(f"{'file':<22}{'records':>8}{'golden':>10}"
+          f"{'new ms':>10}{'legacy ms':>11}{'legacy found':>14}")
+
+    for path in sorted(glob.glob(os.path.join(args.data_dir, "*.json"))):
+        try:
+            fixture = load_fixture(path)
+        except (ValueError, AttributeError, TypeError):
+            continue  # not a question bank
+        if not fixture:
+            continue
+
+        pages = render_pages(fixture)
+        text = "\n".join(pages)
+        total_bytes += len(text.encode("utf-8"))
+
+        t_new, parsed = timed(lambda: list(parse_mcq_stream(pages)), args.repeat)
+        t_old, legacy = timed(lambda: legacy_parse_mcqs(text), args.repeat)
+        new_time += t_new
+        legacy_time += t_old
+
+        matched, expected = golden_matches(fixture, parsed)
+        if matched != expected or len(parsed) != expected:
+            failures.append(os.path.basename(path))
+
+        print(f"{os.path.basename(path):<22}{len(fixture):>8}"
+              f"{matched:>5}/{expected:<4}"
+              f"{t_new * 1000:>10.2f}{t_old * 1000:>11.2f}{len(legacy):>14}")
+
+    mb = total_bytes / 1e6
+    print(f"\n{mb:.2f} MB parsed: tokenizer {mb / new_time:.1f} MB/s, "
+          f"legacy {mb / legacy_time:.1f} MB/s")
+
+    if failures:
+        print("golden mismatches: " + ", ".join(failures))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""Import cost of the entry modules and gunicorn worker ready time.
+
+Import time comes from `python -X importtime` in a fresh interpreter (the
+cumulative microseconds of the module itself); ready time is measured
+from launching gunicorn until a booted worker answers a request. Neither
+should touch the database: the schema is migrated up front by `init-db`.
+
+    python benchmarks/startup_bench.py [--workers 2] [--check]
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ('app', 'models', 'questions_loader', 'files')
+
+# modules that must stay out of an entry module's import graph; metrics
+# registers Flask request hooks, so only the web layer may import it
+FORBIDDEN = {
+    'models': ('app', 'metrics'),
+    'questions_loader': ('app', 'metrics'),
+    'files': ('flask', 'pdfplumber'),
+}
+
+# --check budgets, generous enough for a slow CI box; the offline entry
+# points only need the models, so they must stay well under the app
+MAX_IMPORT_MS = {'app': 1500, 'models': 900, 'questions_loader': 900, 'files': 250}
+MAX_READY_SECONDS = 10.0
+
+
+def import_profile(module, env):
+    """{module name: cumulative import µs} for `import <module>`."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def worker_ready_seconds(env, workers):
+    """Seconds from spawning gunicorn until /login answers."""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers),
+         '--bind', f'127.0.0.1:{port}', 'app:create_app()'],
+        cwd=ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    try:
+        while time.perf_counter() - started < 60:
+            if server.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {server.returncode}")
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/login', timeout=1)
+                return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                time.sleep(0.02)
+        raise RuntimeError("gunicorn did not become ready within 60s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--check', action='store_true',
+                        help='fail when a budget in MAX_IMPORT_MS / '
+                             'MAX_READY_SECONDS is exceeded')
+    args = parser.parse_args(argv)
+
+    failures = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'startup.db')}",
+            METRICS_DIR=os.path.join(tmp, 'metrics')
+        )
+
+        for module in MODULES:
+            profile = import_profile(module, env)
+            ms = profile[module] / 1000
+            print(f"import {module:<18} {ms:8.1f} ms")
+
+            if ms > MAX_IMPORT_MS[module]:
+                failures.append(f"import {module} took {ms:.0f} ms")
+            leaked = [m for m in FORBIDDEN.get(module, ()) if m in profile]
+            if leaked:
+                failures.append(f"import {module} pulled in {', '.join(leaked)}")
+
+        if os.path.exists(os.path.join(tmp, 'startup.db')):
+            failures.append("importing the app created the database")
+
+        subprocess.run(
+            [sys.executable, '-m', 'flask', '--app', 'app', 'init-db'],
+            cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL
+        )
+        ready = worker_ready_seconds(env, args.workers)
+        print(f"gunicorn ready ({args.workers} workers) {ready * 1000:8.1f} ms")
+        if ready > MAX_READY_SECONDS:
+            failures.append(f"workers took {ready:.1f}s to become ready")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1 if args.check else 0
+    print("✅ startup within budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Per-app, read-through cache of the question bank."""
+from collections import namedtuple
+import threading
+
+from flask import current_app, g, has_app_context
+from werkzeug.local import LocalProxy
+
+from models import db, Question, CatalogVersion
+
+# =======================
+# Question Catalog Cache
+# =======================
+
+class CachedQuestion(namedtuple('CachedQuestion', [
+    'id', 'subject', 'level', 'number', 'question_text',
+    'option_a', 'option_b', 'option_c', 'option_d',
+    'correct', 'explanation'
+])):
+    """Immutable, slot-only snapshot of a Question row.
+
+    `correct` is the already-normalised answer letter (A-D).
+    """
+    __slots__ = ()
+
+
+def normalise_option(value):
+    return (value or 'A').strip().upper()[:1] or 'A'
+
+
+def bump_catalog_version():
+    """Mark the question bank as changed for every worker.
+
+    Runs inside the caller's transaction; the caller commits.
+    """
+    updated = CatalogVersion.query.filter_by(id=1).update(
+        {CatalogVersion.version: CatalogVersion.version + 1}
+    )
+    if not updated:
+        db.session.add(CatalogVersion(id=1, version=1))
+
+
+class QuestionCatalog:
+    """Read-through cache of the whole question bank, one per app.
+
+    The first lookup in each app context (i.e. each request) does a
+    primary-key read of `catalog_version`; the bank is only reloaded when
+    that number moved, i.e. after load_questions().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._by_id = {}
+        self._by_key = {}
+        self._subject_levels = {}
+
+    def _current_version(self):
+        version = db.session.query(CatalogVersion.version)\
+            .filter_by(id=1).scalar()
+        return version or 0
+
+    def _refresh(self):
+        # one version check per request is enough
+        if has_app_context():
+            if g.get('_catalog_checked'):
+                return
+            g._catalog_checked = True
+
+        version = self._current_version()
+        if version == self._version:
+            return
+
+        with self._lock:
+            if version == self._version:
+                return
+
+            rows = db.session.query(
+                Question.id, Question.subject, Question.level,
+                Question.number, Question.question_text,
+                Question.option_a, Question.option_b,
+                Question.option_c, Question.option_d,
+                Question.correct_option, Question.explanation
+            ).order_by(Question.id).all()
+
+            by_id = {}
+            by_key = {}
+            for row in rows:
+                q = CachedQuestion(*row[:9], normalise_option(row[9]), row[10])
+                by_id[q.id] = q
+                by_key.setdefault((q.subject, q.level), []).append(q)
+
+            subject_levels = {}
+            for s, l in by_key:
+                subject_levels.setdefault(s, []).append(l)
+
+            self._by_id = by_id
+            self._by_key = {k: tuple(v) for k, v in by_key.items()}
+            self._subject_levels = subject_levels
+            self._version = version
+
+    def subject_levels(self):
+        self._refresh()
+        return self._subject_levels
+
+    def questions(self, subject, level):
+        self._refresh()
+        return self._by_key.get((subject, level), ())
+
+    def get_many(self, ids):
+        self._refresh()
+        by_id = self._by_id
+        return {qid: by_id[qid] for qid in ids if qid in by_id}
+
+
+def init_app(app):
+    # one cache per app: two apps in a process may use different databases
+    app.extensions['catalog'] = QuestionCatalog()
+
+
+# the current app's catalog
+catalog = LocalProxy(lambda: current_app.extensions['catalog'])
@@ -0,0 +1,232 @@
+"""Near-duplicate question detection with MinHash LSH.
+
+Each question (text plus its options, sorted so shuffled copies still
+match) is normalised and cut into word shingles. A MinHash signature
+estimates the Jaccard similarity of two shingle sets, and LSH banding
+buckets the signatures so only likely pairs are ever compared: finding
+duplicates is roughly linear in the bank size rather than quadratic.
+Candidates are confirmed on their exact shingle Jaccard.
+
+Used by `questions_loader.load_questions()` to skip copies at ingest,
+and on its own as a report:
+
+    python dedupe.py [--data-dir data] [--threshold 0.8] [--json out.json]
+"""
+import argparse
+import hashlib
+import json
+import re
+import struct
+import sys
+import unicodedata
+
+DEFAULT_THRESHOLD = 0.8
+
+SHINGLE_SIZE = 3
+
+# 16 bands of 4 rows: a pair at Jaccard 0.8 becomes a candidate with
+# probability ~0.9998, one at 0.3 only ~0.12
+NUM_BANDS = 16
+BAND_ROWS = 4
+NUM_PERM = NUM_BANDS * BAND_ROWS
+
+# one 32-bit hash per permutation, all cut from a single SHAKE digest
+_SIGNATURE_FORMAT = struct.Struct(f'<{NUM_PERM}I')
+
+_WORD_RE = re.compile(r'\w+')
+
+
+# =======================
+# Shingling
+# =======================
+
+def normalise_text(text):
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return _WORD_RE.findall(text)
+
+
+def shingles(fields):
+    """Hashed word shingles of a question's text and options.
+
+    `fields` uses Question column names. Options are sorted, so a copy
+    with the answers in a different order still matches.
+    """
+    options = sorted(
+        ' '.join(normalise_text(fields.get(f'option_{x}')))
+        for x in 'abcd'
+    )
+    words = normalise_text(fields.get('question_text')) + \
+        ' '.join(options).split()
+
+    if len(words) < SHINGLE_SIZE:
+        grams = [' '.join(words)] if words else []
+    else:
+        grams = [
+            ' '.join(words[i:i + SHINGLE_SIZE])
+            for i in range(len(words) - SHINGLE_SIZE + 1)
+        ]
+    return frozenset(g.encode('utf-8') for g in grams)
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+# =======================
+# MinHash LSH
+# =======================
+
+class NearDuplicateIndex:
+    """Incremental MinHash LSH index over question shingle sets.
+
+    `add()` questions one by one; `match()` returns the most similar
+    indexed question at or above `threshold`, if any.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._buckets = [{} for _ in range(NUM_BANDS)]
+        self._shingles = {}
+
+    def __len__(self):
+        return len(self._shingles)
+
+    def signature(self, shingle_set):
+        """NUM_PERM minimum hashes; hashing and the column-wise min run in C."""
+        if not shingle_set:
+            return None
+        unpack = _SIGNATURE_FORMAT.unpack
+        size = _SIGNATURE_FORMAT.size
+        hashes = [unpack(hashlib.shake_128(g).digest(size)) for g in shingle_set]
+        return list(map(min, zip(*hashes)))
+
+    def _band_keys(self, signature):
+        for band in range(NUM_BANDS):
+            start = band * BAND_ROWS
+            yield band, tuple(signature[start:start + BAND_ROWS])
+
+    def add(self, key, shingle_set, signature=None):
+        signature = signature or self.signature(shingle_set)
+        if signature is None:
+            return
+        self._shingles[key] = shingle_set
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def candidates(self, signature):
+        found = set()
+        for band, band_key in self._band_keys(signature):
+            found.update(self._buckets[band].get(band_key, ()))
+        return found
+
+    def matches(self, shingle_set, signature=None):
+        """[(key, similarity)] of every indexed question at/above threshold."""
+        signature = signature or self.signature(shingle_set)
+        if signature is None:
+            return []
+
+        found = []
+        for key in self.candidates(signature):
+            similarity = jaccard(shingle_set, self._shingles[key])
+            if similarity >= self.threshold:
+                found.append((key, similarity))
+        return found
+
+    def match(self, shingle_set, signature=None):
+        """(key, similarity) of the closest indexed near-duplicate, or None."""
+        found = self.matches(shingle_set, signature)
+        return max(found, key=lambda m: m[1]) if found else None
+
+
+def find_duplicate_groups(records, threshold=DEFAULT_THRESHOLD):
+    """Group `(key, fields)` records into near-duplicate clusters.
+
+    Returns a list of clusters (lists of keys, first-seen first), only
+    those with more than one member.
+    """
+    index = NearDuplicateIndex(threshold)
+    parent = {}
+
+    def root(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    order = []
+    for key, fields in records:
+        shingle_set = shingles(fields)
+        signature = index.signature(shingle_set)
+        if signature is None:
+            continue
+
+        parent[key] = key
+        order.append(key)
+        for other, _ in index.matches(shingle_set, signature):
+            parent[root(key)] = root(other)
+        index.add(key, shingle_set, signature)
+
+    clusters = {}
+    for key in order:
+        clusters.setdefault(root(key), []).append(key)
+    return [members for members in clusters.values() if len(members) > 1]
+
+
+# =======================
+# Report
+# =======================
+
+def _bank_records(data_dir):
+    # imported lazily: the report needs neither a database nor Flask
+    from questions_loader import discover_files, iter_json_array, normalise_record
+
+    texts = {}
+    records = []
+    for subject, level, path in discover_files(data_dir):
+        for number, record in enumerate(iter_json_array(path), start=1):
+            fields = normalise_record(record)
+            if fields is None:
+                continue
+            key = (subject, level, number)
+            texts[key] = fields['question_text']
+            records.append((key, fields))
+    return records, texts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--json', dest='json_path', default=None,
+                        help='also write the clusters to this file')
+    parser.add_argument('--show', type=int, default=10,
+                        help='clusters to print (largest first)')
+    args = parser.parse_args(argv)
+
+    records, texts = _bank_records(args.data_dir)
+    groups = find_duplicate_groups(records, args.threshold)
+    groups.sort(key=len, reverse=True)
+
+    copies = sum(len(g) - 1 for g in groups)
+    print(f"{len(records)} questions, {len(groups)} near-duplicate groups, "
+          f"{copies} redundant copies (threshold {args.threshold})")
+
+    for group in groups[:args.show]:
+        print(f"\n× {len(group)}  {texts[group[0]][:90]!r}")
+        for subject, level, number in group:
+            print(f"    {subject} - {level} #{number}")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump([
+                [{"subject": s, "level": l, "number": n} for s, l, n in group]
+                for group in groups
+            ], f, indent=2)
+        print(f"\n📄 wrote {args.json_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
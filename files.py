@@ -1,79 +1,309 @@
-import pdfplumber
+import argparse
+import hashlib
 import json
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 
-PDF_FILE = r"C:\Users\hp\Downloads\Question Bank Linux -1.pdf"
 OUTPUT_JSON = "data/linux.json"
 
+CACHE_DIR = ".pdf_cache"
 
-def extract_text(pdf_path):
-    full_text = []
+# pages handed to a worker at once; each task re-opens the PDF, so
+# batching amortises that cost
+PAGES_PER_TASK = 8
 
+
+def pdf_hash(pdf_path):
+    """sha256 of the PDF's bytes, read in chunks"""
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _page_cache_path(cache_dir, page_no):
+    return os.path.join(cache_dir, f"{page_no:05d}.txt")
+
+
+def _extract_pages(pdf_path, page_numbers):
+    """Worker: extract text for a batch of 0-based page numbers."""
+    # imported here so the tokenizer can be used without pdfminer loaded
+    import pdfplumber
+
+    texts = []
     with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text(x_tolerance=2, y_tolerance=2)
-            if text:
-                full_text.append(text)
+        for page_no in page_numbers:
+            page = pdf.pages[page_no]
+            texts.append(page.extract_text(x_tolerance=2, y_tolerance=2) or "")
+    return texts
+
+
+def iter_pages(pdf_path, workers=None, cache_dir=CACHE_DIR, use_cache=True):
+    """Yield the text of every page, in order.
+
+    Pages are extracted on a process pool and cached on disk under
+    `<cache_dir>/<pdf sha256>/<page>.txt`, so a re-run only pays for
+    pages it has never seen.
+    """
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+
+    pdf_cache = os.path.join(cache_dir, pdf_hash(pdf_path))
+    if use_cache:
+        os.makedirs(pdf_cache, exist_ok=True)
+
+    cached = {}
+    missing = []
+    for page_no in range(page_count):
+        path = _page_cache_path(pdf_cache, page_no)
+        if use_cache and os.path.exists(path):
+            cached[page_no] = path
+        else:
+            missing.append(page_no)
+
+    # runs of consecutive missing pages, so a batch never spans a cached one
+    batches = []
+    for page_no in missing:
+        if batches and page_no == batches[-1][-1] + 1 \
+                and len(batches[-1]) < PAGES_PER_TASK:
+            batches[-1].append(page_no)
+        else:
+            batches.append([page_no])
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            batch[0]: (batch, pool.submit(_extract_pages, pdf_path, batch))
+            for batch in batches
+        }
+
+        page_no = 0
+        while page_no < page_count:
+            if page_no in cached:
+                with open(cached[page_no], "r", encoding="utf-8") as f:
+                    yield f.read()
+                page_no += 1
+                continue
+
+            batch, future = futures.pop(page_no)
+            for batch_page, text in zip(batch, future.result()):
+                if use_cache:
+                    tmp = _page_cache_path(pdf_cache, batch_page) + ".tmp"
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        f.write(text)
+                    os.replace(tmp, _page_cache_path(pdf_cache, batch_page))
+                yield text
+            page_no = batch[-1] + 1
+
+
+def extract_text(pdf_path, workers=None, cache_dir=CACHE_DIR, use_cache=True):
+    pages = iter_pages(pdf_path, workers, cache_dir, use_cache)
+    return "\n".join(text for text in pages if text)
+
+
+# =======================
+# MCQ Tokenizer
+# =======================
+
+# classifies one non-blank line: an answer ("Answer: b)", "Answer - C",
+# "Answer:(d)"), an option ("a) text", "B) text", "(c) text"), or text
+LINE_RE = re.compile(
+    r"^[^\S\n]*(?:"
+    r"(?P<answer>Answer[^\S\n]*[:\-][^\S\n]*\(?(?P<letter>[a-dA-D])\b.*)"
+    r"|\(?(?P<option>[a-dA-D])\)[^\S\n]*(?P<text>.*)"
+    r"|(?P<line>\S.*)"
+    r")$",
+    re.MULTILINE
+)
+
+# an answer that trails the last option on the same line
+INLINE_ANSWER_RE = re.compile(r"\s+Answer\s*[:\-]\s*\(?([a-dA-D])\b")
+
+# the next option marker inside an option line, one per expected letter;
+# lowercase only, so "P(A | B)" inside an option is left alone
+INLINE_OPTION_RES = {
+    letter: re.compile(rf"\s\(?{letter}\)\s+")
+    for letter in "bcd"
+}
 
-    return "\n".join(full_text)
+# with no markers, any text line after an answer starts the next question
+DEFAULT_START_MARKERS = ()
 
+SEEK, QUESTION, OPTIONS = range(3)
 
-def parse_mcqs(text):
-    questions = []
 
-    # Split by "What will be" OR "What is" (works for this PDF)
-    blocks = re.split(
-        r"(?=What\s+(?:will|is|does))",
-        text,
+def compile_markers(markers):
+    if not markers:
+        return None
+    return re.compile(
+        "|".join(f"(?:{m})" for m in markers),
         flags=re.IGNORECASE
     )
 
+
+def _drop_page_number(page):
+    """Page text without its footer, when the last line is a bare number.
+
+    Otherwise the number would be glued onto whatever question or option
+    runs across the page break.
+    """
+    body, _, last = page.rstrip().rpartition("\n")
+    return body if last.strip().isdigit() else page
+
+
+def parse_mcq_stream(pages, start_markers=DEFAULT_START_MARKERS):
+    """Tokenize MCQs from an iterable of page texts in a single pass.
+
+    A state machine (SEEK -> QUESTION -> OPTIONS) driven by LINE_RE: one
+    finditer over each page finds and classifies every non-blank line,
+    and its text is appended to the record being built. Questions can
+    span pages and records are yielded as soon as their answer is seen.
+
+    `start_markers` is a sequence of regexes; when given, a question may
+    only start on a line that begins with one of them, which also lets
+    the tokenizer resynchronise after a block that never got an answer.
+    """
+    start_re = compile_markers(start_markers)
+
+    state = SEEK
+    q_lines = []
+    options = []
     q_no = 1
 
-    for block in blocks:
-        if "Answer:" not in block:
-            continue
+    for page in pages:
+        for line in LINE_RE.finditer(_drop_page_number(page)):
+            kind = line.lastgroup
+            correct = line["letter"] if kind == "answer" else None
 
-        # Extract answer letter
-        ans_match = re.search(r"Answer:\s*([a-dA-D])\)", block)
-        if not ans_match:
-            continue
+            if state == OPTIONS and correct is None:
+                if start_re and start_re.match(line[0]):
+                    state = SEEK  # unanswered block: drop it, reparse line
+                else:
+                    if kind == "text" and len(options) < 4 and \
+                            line["option"].lower() == "abcd"[len(options)]:
+                        options.append("")
+                        text = line["text"]
+                    else:
+                        text = line[0].strip()
+                    # fast path: nothing inline to split off
+                    if ")" not in text and "Answer" not in text:
+                        options[-1] += " " + text
+                        continue
+                    correct = _feed_options(options, text)
+                    if correct is None:
+                        continue
 
-        correct = ans_match.group(1).upper()
+            elif state == QUESTION:
+                if kind != "text" or line["option"] not in "aA":
+                    q_lines.append(line[0])
+                    continue
+                options = [""]
+                state = OPTIONS
+                correct = _feed_options(options, line["text"])
+                if correct is None:
+                    continue
 
-        # Extract options
-        options = re.findall(
-            r"[a-dA-D]\)\s*(.+)",
-            block
-        )
+            if state == OPTIONS:
+                # `correct` closed the block, on its own line or inline
+                if len(options) == 4:
+                    yield _record(q_no, q_lines, options, correct)
+                    q_no += 1
+                state = SEEK
+                continue
 
-        if len(options) < 4:
-            continue
+            # SEEK
+            if kind != "line":
+                continue
+            if start_re is None or start_re.match(line[0]):
+                q_lines = [line[0]]
+                state = QUESTION
 
-        # Question text = everything before option a)
-        q_text = block.split("a)")[0].strip()
 
-        questions.append({
-            "number": q_no,
-            "question_text": q_text,   # 👈 snippet preserved EXACTLY
-            "option_a": options[0].strip(),
-            "option_b": options[1].strip(),
-            "option_c": options[2].strip(),
-            "option_d": options[3].strip(),
-            "correct_option": correct,
-            "explanation": ""
-        })
+def _feed_options(options, text):
+    """Append `text` to the option being collected.
 
-        q_no += 1
+    Splits "x b) y c) z d) w Answer: c" packed onto one line into the
+    following options. Only the new text is scanned. Returns the letter
+    of the inline answer, if the last option carried one.
+    """
+    while len(options) < 4 and ")" in text:
+        found = INLINE_OPTION_RES["abcd"[len(options)]].search(text)
+        if not found:
+            break
+        options[-1] += " " + text[:found.start()]
+        options.append("")
+        text = text[found.end():]
 
-    return questions
+    correct = None
+    if len(options) == 4 and "Answer" in text:
+        answer = INLINE_ANSWER_RE.search(text)
+        if answer:
+            correct = answer.group(1)
+            text = text[:answer.start()]
 
+    options[-1] += " " + text
+    return correct
+
+
+def _record(q_no, q_lines, options, correct):
+    option_a, option_b, option_c, option_d = map(str.strip, options)
+    return {
+        "number": q_no,
+        "question_text": "\n".join(q_lines).strip(),  # snippet preserved
+        "option_a": option_a,
+        "option_b": option_b,
+        "option_c": option_c,
+        "option_d": option_d,
+        "correct_option": correct.upper(),
+        "explanation": ""
+    }
+
+
+def parse_mcqs(text, start_markers=DEFAULT_START_MARKERS):
+    return list(parse_mcq_stream([text], start_markers))
 
-if __name__ == "__main__":
-    raw_text = extract_text(PDF_FILE)
-    mcqs = parse_mcqs(raw_text)
 
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Extract MCQs from a PDF question bank into JSON."
+    )
+    parser.add_argument("pdf", help="path to the question bank PDF")
+    parser.add_argument(
+        "-o", "--output", default=OUTPUT_JSON,
+        help=f"JSON file to write (default: {OUTPUT_JSON})"
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="extraction processes (default: one per CPU)"
+    )
+    parser.add_argument(
+        "--cache-dir", default=CACHE_DIR,
+        help=f"per-page text cache (default: {CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="ignore and don't write the page cache"
+    )
+    parser.add_argument(
+        "-m", "--marker", action="append", dest="markers", default=[],
+        help="regex a question must start with (repeatable), "
+             "e.g. 'What\\s+(?:will|is|does)'"
+    )
+    args = parser.parse_args(argv)
+
+    pages = iter_pages(
+        args.pdf, args.workers, args.cache_dir, use_cache=not args.no_cache
+    )
+    mcqs = list(parse_mcq_stream(pages, args.markers))
+
+    with open(args.output, "w", encoding="utf-8") as f:
         json.dump(mcqs, f, indent=4, ensure_ascii=False)
 
     print(f"✅ Extracted {len(mcqs)} MCQs with snippets preserved")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""Per-request performance instrumentation and a Prometheus /metrics page.
+
+Request hooks time every route; SQLAlchemy cursor events count and time
+SQL statements (logging slow ones); Flask template signals time template
+rendering; `track()` times anything else, such as password hashing.
+
+Each gunicorn worker keeps its numbers in memory and writes a snapshot to
+the app's METRICS_DIR (default: <instance>/metrics) at most once per
+FLUSH_INTERVAL seconds; /metrics merges the snapshots of every live
+worker, so any worker can answer a scrape. A worker removes its snapshot
+when it exits, and snapshots left by workers that died are dropped at
+the next scrape, so a restarted worker's counters start again from zero
+(a counter reset, as far as Prometheus is concerned).
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import (
+    Response, abort, g, has_request_context, request,
+    before_render_template, template_rendered
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+SLOW_QUERY_SECONDS = float(os.environ.get('SLOW_QUERY_MS', 200)) / 1000
+FLUSH_INTERVAL = 1.0
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+BATCH_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+HISTOGRAMS = {
+    'mcq_request_duration_seconds': (
+        'Request latency by route.', LATENCY_BUCKETS
+    ),
+    'mcq_sql_statements_per_request': (
+        'SQL statements issued per request, by route.', STATEMENT_BUCKETS
+    ),
+    'mcq_write_behind_flush_seconds': (
+        'Time to group-commit one write-behind batch.', LATENCY_BUCKETS
+    ),
+    'mcq_write_behind_batch_size': (
+        'Submissions per write-behind batch.', BATCH_BUCKETS
+    ),
+}
+
+COUNTERS = {
+    'mcq_sql_statements_total': 'SQL statements executed, by route.',
+    'mcq_sql_seconds_total': 'Time spent in SQL, by route.',
+    'mcq_slow_queries_total': 'Statements slower than SLOW_QUERY_MS, by route.',
+    'mcq_password_hash_seconds_total': 'Time spent hashing passwords, by route.',
+    'mcq_template_render_seconds_total': 'Time spent rendering templates, by route.',
+    'mcq_write_behind_overflow_total': 'Submissions written inline: write-behind queue full.',
+}
+
+# last value per worker; /metrics reports the sum over workers
+GAUGES = {
+    'mcq_write_behind_queue_depth': 'Submissions waiting in write-behind queues.',
+}
+
+# timed sections reported by track(), mapped to their counter
+TRACKED = {
+    'password_hash': 'mcq_password_hash_seconds_total',
+    'template_render': 'mcq_template_render_seconds_total',
+}
+
+slow_query_log = logging.getLogger('mcq.slow_query')
+
+
+class Registry:
+    """Counters, histograms and gauges for one process, labelled by route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {name: {} for name in COUNTERS}
+        self.histograms = {name: {} for name in HISTOGRAMS}
+        self.gauges = {name: {} for name in GAUGES}
+
+    def inc(self, name, route, value=1):
+        with self._lock:
+            series = self.counters[name]
+            series[route] = series.get(route, 0) + value
+
+    def set(self, name, route, value):
+        with self._lock:
+            self.gauges[name][route] = value
+
+    def observe(self, name, route, value):
+        buckets = HISTOGRAMS[name][1]
+        with self._lock:
+            series = self.histograms[name]
+            # per-bucket (non-cumulative) counts, then sum and count
+            state = series.get(route)
+            if state is None:
+                state = series[route] = [0] * (len(buckets) + 3)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            else:
+                state[len(buckets)] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': {n: dict(s) for n, s in self.counters.items()},
+                'histograms': {
+                    n: {r: list(v) for r, v in s.items()}
+                    for n, s in self.histograms.items()
+                },
+                'gauges': {n: dict(s) for n, s in self.gauges.items()},
+            }
+
+
+registry = Registry()
+
+# set by init_app(); one registry per process, so one directory too
+metrics_dir = None
+
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+
+
+def _snapshot_path(pid=None):
+    return os.path.join(metrics_dir, f'worker-{pid or os.getpid()}.json')
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by someone else
+    return True
+
+
+def flush(force=False):
+    """Write this worker's snapshot, at most once per FLUSH_INTERVAL."""
+    global _last_flush
+
+    now = time.monotonic()
+    if metrics_dir is None or \
+            (not force and now - _last_flush < FLUSH_INTERVAL):
+        return
+
+    # request threads and the write-behind flusher share one snapshot file
+    with _flush_lock:
+        _last_flush = now
+
+        os.makedirs(metrics_dir, exist_ok=True)
+        path = _snapshot_path()
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(registry.snapshot(), f)
+        os.replace(tmp, path)
+
+
+def _remove_snapshot():
+    try:
+        os.unlink(_snapshot_path())
+    except FileNotFoundError:
+        pass
+
+
+def merged_snapshot():
+    """Sum the snapshots of every live worker that has written one.
+
+    Snapshots of workers that are gone are deleted rather than summed.
+    """
+    merged = {
+        'counters': {name: {} for name in COUNTERS},
+        'histograms': {name: {} for name in HISTOGRAMS},
+        'gauges': {name: {} for name in GAUGES},
+    }
+
+    try:
+        names = os.listdir(metrics_dir)
+    except FileNotFoundError:
+        names = []
+
+    for name in names:
+        pid = name[len('worker-'):-len('.json')]
+        if not (name.startswith('worker-') and name.endswith('.json')
+                and pid.isdigit()):
+            continue
+
+        path = os.path.join(metrics_dir, name)
+        if not _pid_alive(int(pid)):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass  # another worker's scrape got there first
+            continue
+
+        try:
+            with open(path, encoding='utf-8') as f:
+                snap = json.load(f)
+        except (OSError, ValueError):
+            continue  # mid-replace or unreadable: skip this scrape
+
+        for metric, series in snap.get('counters', {}).items():
+            target = merged['counters'].setdefault(metric, {})
+            for route, value in series.items():
+                target[route] = target.get(route, 0) + value
+
+        for metric, series in snap.get('gauges', {}).items():
+            target = merged['gauges'].setdefault(metric, {})
+            for route, value in series.items():
+                target[route] = target.get(route, 0) + value
+
+        for metric, series in snap.get('histograms', {}).items():
+            target = merged['histograms'].setdefault(metric, {})
+            for route, values in series.items():
+                if route in target:
+                    target[route] = [a + b for a, b in zip(target[route], values)]
+                else:
+                    target[route] = list(values)
+
+    return merged
+
+
+def _label(route):
+    return route.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def render_prometheus(snapshot):
+    lines = []
+
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for route, state in sorted(snapshot['histograms'].get(name, {}).items()):
+            label = _label(route)
+            cumulative = 0
+            for bound, count in zip(buckets, state):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{route="{label}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{name}_bucket{{route="{label}",le="+Inf"}} {state[-1]}')
+            lines.append(f'{name}_sum{{route="{label}"}} {state[-2]}')
+            lines.append(f'{name}_count{{route="{label}"}} {state[-1]}')
+
+    for name, help_text in COUNTERS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for route, value in sorted(snapshot['counters'].get(name, {}).items()):
+            lines.append(f'{name}{{route="{_label(route)}"}} {value}')
+
+    for name, help_text in GAUGES.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        for route, value in sorted(snapshot['gauges'].get(name, {}).items()):
+            lines.append(f'{name}{{route="{_label(route)}"}} {value}')
+
+    return '\n'.join(lines) + '\n'
+
+
+# =======================
+# Hooks
+# =======================
+
+def _route():
+    return request.endpoint or 'unmatched'
+
+
+@contextmanager
+def track(kind):
+    """Time a block and charge it to the current request's `kind` total."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if has_request_context():
+            timings = g.setdefault('_metrics_timings', {})
+            timings[kind] = timings.get(kind, 0.0) + time.perf_counter() - started
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['_metrics_started'].pop()
+
+    slow = elapsed >= SLOW_QUERY_SECONDS
+    if slow:
+        slow_query_log.warning('slow query (%.1f ms): %s', elapsed * 1000, statement)
+
+    if has_request_context():
+        g._metrics_sql_count = g.get('_metrics_sql_count', 0) + 1
+        g._metrics_sql_time = g.get('_metrics_sql_time', 0.0) + elapsed
+        if slow:
+            g._metrics_slow = g.get('_metrics_slow', 0) + 1
+
+
+def _before_render(sender, template, context, **extra):
+    g._metrics_render_started = time.perf_counter()
+
+
+def _rendered(sender, template, context, **extra):
+    started = g.pop('_metrics_render_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+
+    # a streamed template (stream_template) finishes after after_request
+    # has already recorded the request: charge it directly
+    if g.get('_metrics_recorded'):
+        registry.inc(TRACKED['template_render'], _route(), elapsed)
+        flush()
+        return
+
+    timings = g.setdefault('_metrics_timings', {})
+    timings['template_render'] = timings.get('template_render', 0.0) + elapsed
+
+
+def _before_request():
+    g._metrics_started = time.perf_counter()
+
+
+def _after_request(response):
+    started = g.pop('_metrics_started', None)
+    if started is None:
+        return response
+
+    route = _route()
+    sql_count = g.get('_metrics_sql_count', 0)
+
+    registry.observe('mcq_request_duration_seconds', route,
+                     time.perf_counter() - started)
+    registry.observe('mcq_sql_statements_per_request', route, sql_count)
+    registry.inc('mcq_sql_statements_total', route, sql_count)
+    registry.inc('mcq_sql_seconds_total', route, g.get('_metrics_sql_time', 0.0))
+    registry.inc('mcq_slow_queries_total', route, g.get('_metrics_slow', 0))
+    for kind, seconds in g.get('_metrics_timings', {}).items():
+        registry.inc(TRACKED[kind], route, seconds)
+    g._metrics_recorded = True
+
+    flush()
+    return response
+
+
+def metrics_view():
+    if METRICS_TOKEN and \
+            request.headers.get('Authorization') != f'Bearer {METRICS_TOKEN}':
+        abort(403)
+
+    flush(force=True)
+    return Response(
+        render_prometheus(merged_snapshot()),
+        mimetype='text/plain; version=0.0.4'
+    )
+
+
+def init_app(app):
+    global metrics_dir
+
+    app.config.setdefault(
+        'METRICS_DIR',
+        os.environ.get('METRICS_DIR') or os.path.join(app.instance_path, 'metrics')
+    )
+    if metrics_dir is None:
+        atexit.register(_remove_snapshot)
+    metrics_dir = app.config['METRICS_DIR']
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_rendered, app)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,302 @@
+"""Database models, connection settings and the schema migration step.
+
+Importing this module only defines the models; nothing touches the
+database until `init_schema()` runs (`flask --app app init-db`), which is
+done once per deploy rather than in every worker.
+"""
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import datetime
+import os
+import sqlite3
+
+# =======================
+# Database Config
+# =======================
+
+DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///quiz.db')
+
+# SQLite tuning for several gunicorn workers sharing one database file:
+# WAL lets readers run alongside the single writer, and busy_timeout makes
+# a blocked writer wait for the lock instead of failing "database is locked"
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 15000))
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+
+db = SQLAlchemy()
+
+
+def engine_options(uri):
+    """SQLAlchemy engine options for the database at `uri`."""
+    url = make_url(uri)
+
+    # per worker process; sync gunicorn workers only need one or two
+    options = {
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    }
+    # a server can drop idle connections; a local SQLite file can't, so
+    # a ping on every checkout would only add a round trip per request
+    if url.get_backend_name() != 'sqlite':
+        options['pool_pre_ping'] = True
+    if url.database not in (None, '', ':memory:'):
+        options.update(
+            pool_size=int(os.environ.get('DB_POOL_SIZE', 2)),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 4)),
+        )
+    return options
+
+
+def configure_database(app):
+    """Apply the database settings to `app` and bind `db` to it."""
+    app.config.setdefault('SQLALCHEMY_DATABASE_URI', DATABASE_URL)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config.setdefault(
+        'SQLALCHEMY_ENGINE_OPTIONS',
+        engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    )
+
+    db.init_app(app)
+
+
+def create_db_app(config=None):
+    """A bare app with only the database bound, for scripts and CLI tools.
+
+    Skips routes, templates and metrics, so the loader and other offline
+    tools don't pay for the web stack.
+    """
+    app = Flask(__name__)
+    if config:
+        app.config.update(config)
+    configure_database(app)
+    return app
+
+
+@event.listens_for(Engine, 'connect')
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+    cursor.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+    cursor.close()
+
+# =======================
+# Models
+# =======================
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.String(128), nullable=False)
+    # bumped by "reset progress"; only attempts from the current epoch count
+    progress_epoch = db.Column(
+        db.Integer, nullable=False, default=0, server_default='0'
+    )
+
+    attempts = db.relationship('QuizAttempt', backref='user', lazy=True)
+
+    def set_password(self, password):
+        self.password_hash = generate_password_hash(password)
+
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
+
+
+class Question(db.Model):
+    __table_args__ = (
+        # also the (subject, level) lookup index, and the conflict target
+        # for the loader's INSERT ... ON CONFLICT DO NOTHING
+        db.Index(
+            'ux_question_subject_level_number',
+            'subject', 'level', 'number',
+            unique=True
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(50), nullable=False)
+    level = db.Column(db.String(20), nullable=False)
+    number = db.Column(db.Integer, nullable=False)
+    question_text = db.Column(db.Text, nullable=False)
+    option_a = db.Column(db.String(255), nullable=False)
+    option_b = db.Column(db.String(255), nullable=False)
+    option_c = db.Column(db.String(255), nullable=False)
+    option_d = db.Column(db.String(255), nullable=False)
+    correct_option = db.Column(db.String(10), nullable=False)
+    explanation = db.Column(db.Text)
+
+
+class QuizAttempt(db.Model):
+    __table_args__ = (
+        # serves both the solved-question subquery (user_id, epoch prefix)
+        # and keyset pagination of the attempt history
+        db.Index(
+            'ix_quiz_attempt_user_epoch_created',
+            'user_id', 'epoch', 'created_at', 'id'
+        ),
+        # makes replaying a write-behind journal idempotent
+        db.Index(
+            'ux_quiz_attempt_submission', 'submission_id', unique=True
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    epoch = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    subject = db.Column(db.String(50), nullable=False)
+    level = db.Column(db.String(20), nullable=False)
+    score = db.Column(db.Integer, nullable=False)
+    total_questions = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # uuid of a POST /quiz submission; NULL for paged quizzes
+    submission_id = db.Column(db.String(32))
+
+    answers = db.relationship('QuizAnswer', backref='attempt', lazy=True)
+
+
+class QuizAnswer(db.Model):
+    __table_args__ = (
+        db.Index('ix_quiz_answer_attempt_question', 'attempt_id', 'question_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    attempt_id = db.Column(db.Integer, db.ForeignKey('quiz_attempt.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
+    chosen_option = db.Column(db.String(1))
+    is_correct = db.Column(db.Boolean, default=False)
+
+
+class UserProgress(db.Model):
+    """Per-user, per-(subject, level) rollup maintained at submit time."""
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'subject', 'level'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    subject = db.Column(db.String(50), nullable=False)
+    level = db.Column(db.String(20), nullable=False)
+    # a row from an older epoch is stale and restarts on the next submit
+    epoch = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    best_score = db.Column(db.Integer, nullable=False, default=0)
+    total_answered = db.Column(db.Integer, nullable=False, default=0)
+    total_correct = db.Column(db.Integer, nullable=False, default=0)
+
+
+class QuestionStats(db.Model):
+    """Per-question counters, maintained in the grading transaction."""
+    __table_args__ = (
+        # adaptive selection seeks one (subject, level, bucket) at a time
+        db.Index(
+            'ix_question_stats_bucket',
+            'subject', 'level', 'difficulty_bucket', 'question_id'
+        ),
+    )
+
+    question_id = db.Column(
+        db.Integer, db.ForeignKey('question.id'), primary_key=True
+    )
+    # copied from Question so the bucket index can be scoped to one bank
+    subject = db.Column(db.String(50), nullable=False)
+    level = db.Column(db.String(20), nullable=False)
+    times_served = db.Column(db.Integer, nullable=False, default=0)
+    times_correct = db.Column(db.Integer, nullable=False, default=0)
+    last_served_at = db.Column(db.DateTime)
+    # 0 (easy) .. DIFFICULTY_BUCKETS - 1 (hard) by failure rate;
+    # NULL until the question has been served MIN_RATED_SERVES times
+    difficulty_bucket = db.Column(db.Integer)
+
+
+class QuizSession(db.Model):
+    """Fixed question order of a paged quiz, graded chunk by chunk."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    epoch = db.Column(db.Integer, nullable=False, default=0)
+    subject = db.Column(db.String(50), nullable=False)
+    level = db.Column(db.String(20), nullable=False)
+    # comma-separated question ids, in serving order
+    question_ids = db.Column(db.Text, nullable=False)
+    # questions graded so far; chunks are submitted in order
+    graded = db.Column(db.Integer, nullable=False, default=0)
+    attempt_id = db.Column(db.Integer, db.ForeignKey('quiz_attempt.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def ids(self):
+        return [int(qid) for qid in self.question_ids.split(',')]
+
+
+class IngestManifest(db.Model):
+    """Content hash of each data file as of its last successful load."""
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255), unique=True, nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False)
+    rows = db.Column(db.Integer, nullable=False, default=0)
+    loaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class CatalogVersion(db.Model):
+    """Single-row counter bumped whenever the question bank changes."""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+# =======================
+# Schema Migration
+# =======================
+
+def _add_missing_columns():
+    """Bring tables created by older versions up to the current models.
+
+    Only handles plain column additions, which need a server default.
+    """
+    inspector = db.inspect(db.engine)
+
+    for table in db.metadata.sorted_tables:
+        existing = {c['name'] for c in inspector.get_columns(table.name)}
+
+        for column in table.columns:
+            if column.name in existing:
+                continue
+
+            ddl = db.schema.CreateColumn(column).compile(dialect=db.engine.dialect)
+            with db.engine.begin() as conn:
+                conn.execute(db.text(f'ALTER TABLE "{table.name}" ADD COLUMN {ddl}'))
+
+
+def init_schema():
+    """Create or upgrade the schema; safe to run repeatedly.
+
+    Needs an app context. Run once per deploy (`flask --app app init-db`)
+    before the workers start.
+    """
+    from progress import rebuild_progress, rebuild_question_stats
+    from search import init_search_index
+
+    db.create_all()
+    _add_missing_columns()
+
+    # create_all() skips tables that already exist, so make sure indexes
+    # added later also land on older databases
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+    init_search_index()
+
+    # first start with the rollup table: backfill it from existing history
+    if not db.session.query(UserProgress.query.exists()).scalar() and \
+            db.session.query(QuizAttempt.query.exists()).scalar():
+        rebuild_progress()
+        db.session.commit()
+
+    # same for the per-question counters
+    if not db.session.query(QuestionStats.query.exists()).scalar() and \
+            db.session.query(QuizAnswer.query.exists()).scalar():
+        rebuild_question_stats()
+        db.session.commit()
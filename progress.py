@@ -0,0 +1,294 @@
+"""Progress rollups, attempt history paging and epoch compaction."""
+from datetime import datetime
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import (
+    db, User, Question, QuizAttempt, QuizAnswer, UserProgress,
+    QuizSession, QuestionStats
+)
+
+# =======================
+# Progress Rollups
+# =======================
+
+HISTORY_PAGE_SIZE = 20
+
+
+def current_epoch(user_id):
+    epoch = db.session.query(User.progress_epoch)\
+        .filter_by(id=user_id).scalar()
+    return epoch or 0
+
+
+def record_progress(user_id, epoch, subject, level, score, answered,
+                    new_attempt=True, best_score=None):
+    """Fold graded answers into the user's rollup row (upsert).
+
+    `score`/`answered` are added to the totals; a paged quiz folds in one
+    chunk at a time, passing new_attempt=False after its first chunk and
+    its running score as `best_score`. A row left over from an earlier
+    epoch is overwritten rather than added to; a submission from an
+    earlier epoch than the row's (graded before a reset, written after
+    it) is ignored. Runs inside the caller's transaction; the caller
+    commits.
+    """
+    stmt = sqlite_insert(UserProgress).values(
+        user_id=user_id,
+        subject=subject,
+        level=level,
+        epoch=epoch,
+        attempts=1 if new_attempt else 0,
+        best_score=score if best_score is None else best_score,
+        total_answered=answered,
+        total_correct=score
+    )
+    excluded = stmt.excluded
+
+    def fold(merged, column):
+        return db.case(
+            (UserProgress.epoch == excluded.epoch, merged),
+            else_=getattr(excluded, column)
+        )
+
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['user_id', 'subject', 'level'],
+        set_={
+            'epoch': excluded.epoch,
+            'attempts': fold(
+                UserProgress.attempts + excluded.attempts, 'attempts'
+            ),
+            'best_score': fold(
+                db.func.max(UserProgress.best_score, excluded.best_score),
+                'best_score'
+            ),
+            'total_answered': fold(
+                UserProgress.total_answered + excluded.total_answered,
+                'total_answered'
+            ),
+            'total_correct': fold(
+                UserProgress.total_correct + excluded.total_correct,
+                'total_correct'
+            ),
+        },
+        where=UserProgress.epoch <= excluded.epoch
+    ))
+
+
+def rebuild_progress():
+    """Recompute every rollup row from the current-epoch attempt history."""
+    UserProgress.query.delete()
+
+    answered = db.session.query(
+        QuizAnswer.attempt_id.label('attempt_id'),
+        db.func.count().label('n')
+    ).group_by(QuizAnswer.attempt_id).subquery()
+
+    rows = db.session.query(
+        QuizAttempt.user_id,
+        QuizAttempt.subject,
+        QuizAttempt.level,
+        QuizAttempt.epoch,
+        db.func.count(QuizAttempt.id),
+        db.func.max(QuizAttempt.score),
+        db.func.coalesce(db.func.sum(answered.c.n), 0),
+        db.func.sum(QuizAttempt.score)
+    ).join(
+        User, (User.id == QuizAttempt.user_id) &
+              (User.progress_epoch == QuizAttempt.epoch)
+    ).outerjoin(
+        answered, answered.c.attempt_id == QuizAttempt.id
+    ).group_by(
+        QuizAttempt.user_id, QuizAttempt.subject, QuizAttempt.level,
+        QuizAttempt.epoch
+    ).all()
+
+    if rows:
+        db.session.execute(db.insert(UserProgress), [
+            {
+                "user_id": user_id,
+                "subject": subject,
+                "level": level,
+                "epoch": epoch,
+                "attempts": attempts,
+                "best_score": best_score,
+                "total_answered": total_answered,
+                "total_correct": total_correct
+            }
+            for (user_id, subject, level, epoch, attempts, best_score,
+                 total_answered, total_correct) in rows
+        ])
+
+
+def parse_history_cursor(value):
+    """Decode a `<created_at iso>_<id>` history cursor, or None."""
+    if not value:
+        return None
+    try:
+        created_at, attempt_id = value.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), int(attempt_id)
+    except ValueError:
+        return None
+
+
+def history_page(user_id, epoch, cursor=None, page_size=HISTORY_PAGE_SIZE):
+    """Return one page of attempts (newest first) and the next cursor.
+
+    Keyset pagination on (created_at, id) walks
+    ix_quiz_attempt_user_epoch_created, so deep pages cost the same as the
+    first.
+    """
+    query = QuizAttempt.query.filter_by(user_id=user_id, epoch=epoch)
+
+    if cursor:
+        query = query.filter(
+            db.tuple_(QuizAttempt.created_at, QuizAttempt.id) < cursor
+        )
+
+    attempts = query.order_by(
+        QuizAttempt.created_at.desc(), QuizAttempt.id.desc()
+    ).limit(page_size + 1).all()
+
+    next_cursor = None
+    if len(attempts) > page_size:
+        attempts = attempts[:page_size]
+        last = attempts[-1]
+        next_cursor = f"{last.created_at.isoformat()}_{last.id}"
+
+    return attempts, next_cursor
+
+# =======================
+# Question Stats
+# =======================
+
+DIFFICULTY_BUCKETS = 10
+
+# serves needed before a question's failure rate means anything
+MIN_RATED_SERVES = 5
+
+
+def difficulty_bucket(served, correct):
+    """Failure-rate bucket, 0 (easy) .. DIFFICULTY_BUCKETS - 1, or None."""
+    if served < MIN_RATED_SERVES:
+        return None
+    failed = served - correct
+    return min(DIFFICULTY_BUCKETS - 1, failed * DIFFICULTY_BUCKETS // served)
+
+
+def record_question_stats(graded, served_at=None):
+    """Fold graded `(question, is_correct)` pairs into question_stats.
+
+    One executemany upsert; the difficulty bucket is recomputed from the
+    new totals in the same statement. Runs inside the caller's
+    transaction; the caller commits.
+    """
+    served_at = served_at or datetime.utcnow()
+    rows = [
+        {
+            "question_id": q.id,
+            "subject": q.subject,
+            "level": q.level,
+            "times_served": 1,
+            "times_correct": int(is_correct),
+            "last_served_at": served_at,
+            "difficulty_bucket": difficulty_bucket(1, int(is_correct))
+        }
+        for q, is_correct in graded
+    ]
+    if not rows:
+        return
+
+    stmt = sqlite_insert(QuestionStats)
+    excluded = stmt.excluded
+
+    served = QuestionStats.times_served + excluded.times_served
+    correct = QuestionStats.times_correct + excluded.times_correct
+
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['question_id'],
+        set_={
+            'times_served': served,
+            'times_correct': correct,
+            'last_served_at': excluded.last_served_at,
+            'difficulty_bucket': db.case(
+                (served >= MIN_RATED_SERVES, db.func.min(
+                    DIFFICULTY_BUCKETS - 1,
+                    (served - correct) * DIFFICULTY_BUCKETS // served
+                )),
+                else_=None
+            ),
+        }
+    ), rows)
+
+
+def rebuild_question_stats():
+    """Recompute question_stats from the answer history (one full pass)."""
+    QuestionStats.query.delete()
+
+    rows = db.session.query(
+        QuizAnswer.question_id,
+        Question.subject,
+        Question.level,
+        db.func.count(),
+        db.func.sum(db.case((QuizAnswer.is_correct, 1), else_=0)),
+        db.func.max(QuizAttempt.created_at)
+    ).join(
+        Question, Question.id == QuizAnswer.question_id
+    ).join(
+        QuizAttempt, QuizAttempt.id == QuizAnswer.attempt_id
+    ).group_by(QuizAnswer.question_id).all()
+
+    if rows:
+        db.session.execute(db.insert(QuestionStats), [
+            {
+                "question_id": qid,
+                "subject": subject,
+                "level": level,
+                "times_served": served,
+                "times_correct": correct,
+                "last_served_at": last_served_at,
+                "difficulty_bucket": difficulty_bucket(served, correct)
+            }
+            for qid, subject, level, served, correct, last_served_at in rows
+        ])
+
+# =======================
+# Progress Compaction
+# =======================
+
+COMPACT_BATCH_SIZE = 500
+
+
+def compact_progress(batch_size=COMPACT_BATCH_SIZE):
+    """Purge attempts and answers left behind by earlier progress epochs.
+
+    Deletes in small batches, committing after each one, so the SQLite
+    write lock is only ever held briefly. Returns the number of attempts
+    removed.
+    """
+    removed = 0
+
+    while True:
+        stale_ids = [aid for (aid,) in db.session.query(QuizAttempt.id).join(
+            User, User.id == QuizAttempt.user_id
+        ).filter(
+            QuizAttempt.epoch < User.progress_epoch
+        ).limit(batch_size)]
+
+        if not stale_ids:
+            break
+
+        QuizAnswer.query.filter(
+            QuizAnswer.attempt_id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+        QuizSession.query.filter(
+            QuizSession.attempt_id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+        QuizAttempt.query.filter(
+            QuizAttempt.id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+        removed += len(stale_ids)
+
+    return removed
@@ -1,73 +1,398 @@
 import os
 import json
-from app import app, db, Question
+import argparse
+import time
+import hashlib
+from datetime import datetime
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import db, create_db_app, Question, IngestManifest
+from catalog import bump_catalog_version
+from dedupe import NearDuplicateIndex, shingles
 
 
 DATA_DIR = "data"
 
-FILES = [
-    ("Linux", "Easy", "linux.json"),
-    # Add more subjects & levels if needed
-]
+# optional overrides: {"file.json": {"subject": ..., "level": ...}} or
+# {"file.json": null} to skip a file; anything not listed is named from
+# the file itself, e.g. "linux_med.json" -> ("Linux", "Medium")
+MANIFEST_FILE = "manifest.json"
 
+DEFAULT_LEVEL = "Easy"
 
-def ensure_file(path):
-    """Create file if missing"""
+LEVEL_ALIASES = {
+    "easy": "Easy",
+    "med": "Medium",
+    "medium": "Medium",
+    "hard": "Hard",
+}
+
+BATCH_SIZE = 500
+
+READ_CHUNK_SIZE = 1 << 16
+
+
+# =======================
+# Streaming JSON
+# =======================
+
+def iter_json_array(path, chunk_size=READ_CHUNK_SIZE):
+    """Yield the items of a top-level JSON array one at a time.
+
+    Only the current chunk and the record being decoded are held in
+    memory, never the whole list.
+    """
+    decoder = json.JSONDecoder()
+
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        eof = False
+        opened = False
+
+        while True:
+            # skip whitespace, refilling the buffer as needed
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf) or eof:
+                    break
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+
+            if pos >= len(buf):
+                if not opened:
+                    return  # empty file
+                raise ValueError(f"{path}: unexpected end of JSON array")
+
+            ch = buf[pos]
+
+            if not opened:
+                if ch != "[":
+                    raise ValueError(f"{path}: expected a JSON array")
+                opened = True
+                pos += 1
+                continue
+
+            if ch == "]":
+                return
+
+            if ch == ",":
+                pos += 1
+                continue
+
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # record straddles the chunk boundary: read more
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+
+            yield item
+            pos = end
+
+
+# =======================
+# Schema Adapters
+# =======================
+
+SCHEMA_ADAPTERS = []
+
+
+def schema_adapter(*required_keys):
+    """Register a record normaliser for records carrying `required_keys`.
+
+    Adapters are tried in registration order; the first match wins.
+    """
+    def register(fn):
+        SCHEMA_ADAPTERS.append((frozenset(required_keys), fn))
+        return fn
+    return register
+
+
+@schema_adapter("question_text", "option_a")
+def option_columns_schema(record):
+    """linux.json style: question_text, option_a..d, correct_option"""
+    return {
+        "question_text": record.get("question_text", ""),
+        "option_a": record.get("option_a", ""),
+        "option_b": record.get("option_b", ""),
+        "option_c": record.get("option_c", ""),
+        "option_d": record.get("option_d", ""),
+        "correct_option": record.get("correct_option", "A"),
+        "explanation": record.get("explanation", "")
+    }
+
+
+@schema_adapter("question", "A")
+def lettered_schema(record):
+    """db.json style: question, A..D, answer"""
+    return {
+        "question_text": record.get("question", ""),
+        "option_a": record.get("A", ""),
+        "option_b": record.get("B", ""),
+        "option_c": record.get("C", ""),
+        "option_d": record.get("D", ""),
+        "correct_option": record.get("answer", "A"),
+        "explanation": record.get("explanation", "")
+    }
+
+
+def normalise_record(record):
+    """Map any known record schema onto Question columns, or None."""
+    if not isinstance(record, dict):
+        return None
+
+    keys = record.keys()
+    for required, adapter in SCHEMA_ADAPTERS:
+        if required <= keys:
+            return adapter(record)
+    return None
+
+
+# =======================
+# File Discovery
+# =======================
+
+def read_manifest(data_dir):
+    path = os.path.join(data_dir, MANIFEST_FILE)
     if not os.path.exists(path):
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump([], f, indent=4)
-        print(f"📁 Created new file: {path}")
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
 
 
-def load_questions():
-    with app.app_context():
-        total_loaded = 0
+def name_from_file(filename):
+    """("Subject", "Level") from a name like "linux_med.json"."""
+    tokens = os.path.splitext(filename)[0].replace("-", "_").split("_")
+    tokens = [t for t in tokens if t]
+
+    level = DEFAULT_LEVEL
+    if len(tokens) > 1 and tokens[-1].lower() in LEVEL_ALIASES:
+        level = LEVEL_ALIASES[tokens.pop().lower()]
 
-        for subject, level, filename in FILES:
-            path = os.path.join(DATA_DIR, filename)
+    subject = " ".join(t[:1].upper() + t[1:] for t in tokens)
+    return subject, level
 
-            ensure_file(path)
 
-            with open(path, "r", encoding="utf-8") as f:
-                questions = json.load(f)
+def discover_files(data_dir=DATA_DIR):
+    """(subject, level, path) for every *.json bank in `data_dir`.
 
-            added_count = 0
+    Questions are numbered by position within their (subject, level), so
+    two files feeding the same bank would shadow each other's records;
+    that is refused: map or skip one of them in the manifest.
+    """
+    manifest = read_manifest(data_dir)
+    found = []
+    banks = {}
 
-            for i, q in enumerate(questions, start=1):
+    for filename in sorted(os.listdir(data_dir)):
+        path = os.path.join(data_dir, filename)
+        if not filename.endswith(".json") or filename == MANIFEST_FILE \
+                or not os.path.isfile(path):
+            continue
 
-                # Avoid duplicates (auto-number)
-                existing = Question.query.filter_by(
-                    subject=subject,
-                    level=level,
-                    number=i
-                ).first()
+        if filename in manifest:
+            entry = manifest[filename]
+            if entry is None:
+                continue
+            subject, level = entry["subject"], entry["level"]
+        else:
+            subject, level = name_from_file(filename)
 
-                if existing:
-                    continue
+        if (subject, level) in banks:
+            raise ValueError(
+                f"{banks[subject, level]} and {filename} both map to "
+                f"{subject} - {level}; set one of them in {MANIFEST_FILE}"
+            )
+        banks[subject, level] = filename
+        found.append((subject, level, path))
 
-                new_question = Question(
-                    subject=subject,
-                    level=level,
-                    number=i,
-                    question_text=q.get("question_text", ""),
-                    option_a=q.get("option_a", ""),
-                    option_b=q.get("option_b", ""),
-                    option_c=q.get("option_c", ""),
-                    option_d=q.get("option_d", ""),
-                    correct_option=q.get("correct_option", "A"),
-                    explanation=q.get("explanation", "")
-                )
+    return found
 
-                db.session.add(new_question)
-                added_count += 1
-                total_loaded += 1
 
+# =======================
+# Ingest
+# =======================
+
+def file_hash(path):
+    """sha256 of the file's bytes, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def existing_numbers(subject, level):
+    """All question numbers already stored for (subject, level), one query"""
+    rows = db.session.query(Question.number).filter_by(
+        subject=subject, level=level
+    )
+    return {number for (number,) in rows}
+
+
+def record_manifest(filename, content_hash, rows):
+    stmt = sqlite_insert(IngestManifest).values(
+        filename=filename,
+        content_hash=content_hash,
+        rows=rows,
+        loaded_at=datetime.utcnow()
+    )
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['filename'],
+        set_={
+            'content_hash': stmt.excluded.content_hash,
+            'rows': stmt.excluded.rows,
+            'loaded_at': stmt.excluded.loaded_at,
+        }
+    ))
+
+
+def insert_batch(rows):
+    # executemany; ON CONFLICT guards against a concurrent loader
+    # the question_fts triggers index each new row in the same transaction
+    db.session.execute(
+        sqlite_insert(Question).on_conflict_do_nothing(
+            index_elements=['subject', 'level', 'number']
+        ),
+        rows
+    )
+
+
+def unchanged(path, content_hash=None):
+    """True when `path` still matches its ingest manifest entry."""
+    content_hash = content_hash or file_hash(path)
+    manifest = IngestManifest.query.filter_by(filename=path).first()
+    return bool(manifest and manifest.content_hash == content_hash)
+
+
+def duplicate_index():
+    """A NearDuplicateIndex seeded with every question already stored."""
+    index = NearDuplicateIndex()
+    rows = db.session.query(
+        Question.subject, Question.level, Question.number,
+        Question.question_text, Question.option_a, Question.option_b,
+        Question.option_c, Question.option_d
+    )
+    for subject, level, number, text, a, b, c, d in rows:
+        index.add((subject, level, number), shingles({
+            "question_text": text,
+            "option_a": a, "option_b": b, "option_c": c, "option_d": d
+        }))
+    return index
+
+
+def ingest_file(subject, level, path, force=False, duplicates=None):
+    """Stream one JSON file into the bank; returns the number of new rows.
+
+    Records are normalised through SCHEMA_ADAPTERS and inserted in
+    batches of BATCH_SIZE, so memory stays bounded whatever the file
+    size. Files whose content hash matches the ingest manifest are
+    skipped unless `force` is set. With a `duplicates` index, records
+    that near-duplicate a question already in the bank (or loaded
+    earlier in this run) are skipped too.
+    """
+    content_hash = file_hash(path)
+
+    if not force and unchanged(path, content_hash):
+        print(f"⏭ Unchanged, skipped → {subject} - {level} ({path})")
+        return 0
+
+    started = time.perf_counter()
+
+    known = existing_numbers(subject, level)
+    seen = 0
+    skipped = 0
+    copies = 0
+    added = 0
+    batch = []
+
+    for i, record in enumerate(iter_json_array(path), start=1):
+        seen += 1
+
+        if i in known:  # avoid duplicates (auto-number)
+            continue
+
+        fields = normalise_record(record)
+        if fields is None:
+            skipped += 1
+            continue
+
+        if duplicates is not None:
+            shingle_set = shingles(fields)
+            signature = duplicates.signature(shingle_set)
+            if duplicates.match(shingle_set, signature):
+                copies += 1
+                continue
+            duplicates.add((subject, level, i), shingle_set, signature)
+
+        batch.append(dict(fields, subject=subject, level=level, number=i))
+
+        if len(batch) >= BATCH_SIZE:
+            insert_batch(batch)
+            added += len(batch)
+            batch = []
+
+    if batch:
+        insert_batch(batch)
+        added += len(batch)
+
+    record_manifest(path, content_hash, seen)
+    db.session.commit()
+
+    elapsed = time.perf_counter() - started
+    rate = seen / elapsed if elapsed else 0.0
+    note = f", {skipped} unrecognised" if skipped else ""
+    if copies:
+        note += f", {copies} near-duplicates skipped"
+    print(
+        f"✔ Loaded {added} → {subject} - {level} ({path}) "
+        f"[{seen} rows in {elapsed:.3f}s, {rate:,.0f} rows/sec{note}]"
+    )
+    return added
+
+
+def load_questions(data_dir=DATA_DIR, force=False, app=None, dedupe=True):
+    """Ingest every bank in `data_dir`; the schema must already exist.
+
+    Without an `app`, a bare database-only app is used, so loading never
+    imports the web stack. `dedupe` skips near-duplicate questions (see
+    dedupe.py) across the whole bank.
+    """
+    app = app or create_db_app()
+    with app.app_context():
+        total_loaded = 0
+        duplicates = None
+
+        for subject, level, path in discover_files(data_dir):
+            # built lazily: a run where every file is unchanged skips it
+            if dedupe and duplicates is None and (
+                    force or not unchanged(path)):
+                duplicates = duplicate_index()
+            total_loaded += ingest_file(
+                subject, level, path, force=force, duplicates=duplicates
+            )
+
+        # tell every worker's catalog cache to reload the bank
+        if total_loaded:
+            bump_catalog_version()
             db.session.commit()
-            print(f"✔ Loaded {added_count} → {subject} - {level} ({filename})")
 
         print(f"🎯 TOTAL LOADED: {total_loaded} questions into database!")
 
 
 if __name__ == "__main__":
-    load_questions()
+    parser = argparse.ArgumentParser(description="Load data/*.json into the question bank")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--force", action="store_true",
+                        help="re-ingest files even if unchanged")
+    parser.add_argument("--no-dedupe", action="store_true",
+                        help="keep near-duplicate questions")
+    args = parser.parse_args()
+
+    load_questions(args.data_dir, force=args.force, dedupe=not args.no_dedupe)
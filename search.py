@@ -0,0 +1,150 @@
+"""Full-text question search on an SQLite FTS5 index.
+
+`question_fts` is an external-content FTS5 table over `question`: it
+stores only the index, reads the text back from `question` by rowid,
+and is kept in sync by triggers, so every insert the loader makes (or
+any later update/delete) lands in the index in the same transaction.
+"""
+import re
+from collections import namedtuple
+
+from markupsafe import Markup, escape
+
+from models import db
+
+SEARCH_PAGE_SIZE = 20
+
+# column weights for bm25(), in FTS column order
+FTS_COLUMNS = (
+    ('question_text', 10.0),
+    ('option_a', 2.0),
+    ('option_b', 2.0),
+    ('option_c', 2.0),
+    ('option_d', 2.0),
+    ('explanation', 1.0),
+)
+
+SNIPPET_TOKENS = 16
+
+# private-use markers around matches, swapped for <mark> after escaping
+_HIT_OPEN = '\ue000'
+_HIT_CLOSE = '\ue001'
+
+_COLUMN_LIST = ', '.join(name for name, _ in FTS_COLUMNS)
+_NEW_VALUES = ', '.join(f'new.{name}' for name, _ in FTS_COLUMNS)
+_OLD_VALUES = ', '.join(f'old.{name}' for name, _ in FTS_COLUMNS)
+
+FTS_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS question_fts USING fts5(
+        {_COLUMN_LIST},
+        content='question', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS question_fts_ai AFTER INSERT ON question
+    BEGIN
+        INSERT INTO question_fts(rowid, {_COLUMN_LIST})
+        VALUES (new.id, {_NEW_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS question_fts_ad AFTER DELETE ON question
+    BEGIN
+        INSERT INTO question_fts(question_fts, rowid, {_COLUMN_LIST})
+        VALUES ('delete', old.id, {_OLD_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS question_fts_au AFTER UPDATE ON question
+    BEGIN
+        INSERT INTO question_fts(question_fts, rowid, {_COLUMN_LIST})
+        VALUES ('delete', old.id, {_OLD_VALUES});
+        INSERT INTO question_fts(rowid, {_COLUMN_LIST})
+        VALUES (new.id, {_NEW_VALUES});
+    END""",
+)
+
+SearchHit = namedtuple('SearchHit', ['id', 'subject', 'level', 'number', 'snippet'])
+
+
+def init_search_index():
+    """Create the FTS table and triggers; index existing rows the first time.
+
+    Part of init_schema(); needs an app context.
+    """
+    with db.engine.begin() as conn:
+        created = not conn.execute(db.text(
+            "SELECT 1 FROM sqlite_master WHERE name = 'question_fts'"
+        )).first()
+
+        for ddl in FTS_DDL:
+            conn.execute(db.text(ddl))
+
+        # questions loaded before the index existed
+        if created:
+            conn.execute(db.text(
+                "INSERT INTO question_fts(question_fts) VALUES ('rebuild')"
+            ))
+
+
+def fts_query(text):
+    """Turn free text into a safe FTS5 query.
+
+    Every word is quoted (so user input can't inject FTS syntax) and all
+    must match; the last one also matches as a prefix, for partial words.
+    Returns None when there is nothing to search for.
+    """
+    words = re.findall(r'\w+', text or '')
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _highlight(snippet):
+    return Markup(
+        str(escape(snippet))
+        .replace(_HIT_OPEN, '<mark>')
+        .replace(_HIT_CLOSE, '</mark>')
+    )
+
+
+def search_questions(text, subject=None, level=None, page=1,
+                     page_size=SEARCH_PAGE_SIZE):
+    """One page of questions matching `text`, best match first.
+
+    Returns (hits, has_next). Ranked by bm25 with the question text
+    weighted highest; offset pagination fetches one extra row to know
+    whether another page exists.
+    """
+    match = fts_query(text)
+    if match is None:
+        return [], False
+
+    weights = ', '.join(str(w) for _, w in FTS_COLUMNS)
+    filters = ''
+    params = {
+        'match': match,
+        'limit': page_size + 1,
+        'offset': (max(page, 1) - 1) * page_size,
+        'open': _HIT_OPEN,
+        'close': _HIT_CLOSE,
+    }
+    if subject:
+        filters += ' AND q.subject = :subject'
+        params['subject'] = subject
+    if level:
+        filters += ' AND q.level = :level'
+        params['level'] = level
+
+    rows = db.session.execute(db.text(f"""
+        SELECT q.id, q.subject, q.level, q.number,
+               snippet(question_fts, -1, :open, :close, '…', {SNIPPET_TOKENS})
+        FROM question_fts
+        JOIN question AS q ON q.id = question_fts.rowid
+        WHERE question_fts MATCH :match{filters}
+        ORDER BY bm25(question_fts, {weights})
+        LIMIT :limit OFFSET :offset
+    """), params).all()
+
+    hits = [
+        SearchHit(qid, s, l, number, _highlight(snippet))
+        for qid, s, l, number, snippet in rows[:page_size]
+    ]
+    return hits, len(rows) > page_size
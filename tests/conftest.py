@@ -0,0 +1,56 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import create_app  # noqa: E402
+from models import db, init_schema, User, Question  # noqa: E402
+
+PASSWORD = "test-pw"
+BANK_SIZE = 60
+
+
+@pytest.fixture
+def app(tmp_path):
+    """A fresh app on a temp SQLite file: one user, one 60-question bank."""
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'METRICS_DIR': str(tmp_path / 'metrics'),
+        'WRITE_BEHIND_JOURNAL_DIR': str(tmp_path / 'write-behind'),
+    })
+
+    with app.app_context():
+        init_schema()
+        user = User(username="alice", email="alice@example.com")
+        user.set_password(PASSWORD)
+        db.session.add(user)
+        db.session.execute(db.insert(Question), [
+            {
+                "subject": "Python", "level": "Easy", "number": n,
+                "question_text": f"Question {n}?",
+                "option_a": "a", "option_b": "b",
+                "option_c": "c", "option_d": "d",
+                "correct_option": "A", "explanation": ""
+            }
+            for n in range(1, BANK_SIZE + 1)
+        ])
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    response = client.post('/login', data={
+        'username_or_email': 'alice', 'password': PASSWORD
+    })
+    assert response.status_code == 302
+    return client
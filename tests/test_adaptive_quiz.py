@@ -0,0 +1,86 @@
+"""Adaptive quizzes: the difficulty target follows skill, not miss rate."""
+import pytest
+
+from app import TARGET_SUCCESS, _target_difficulty
+from models import db, Question, QuestionStats, QuizAnswer, QuizAttempt, User
+
+
+@pytest.mark.parametrize('difficulty', ['nan', 'inf', '-inf'])
+def test_non_finite_difficulty_is_rejected(client, difficulty):
+    response = client.get('/quiz', query_string={
+        'subject': 'Python', 'level': 'Easy', 'limit': 5,
+        'order': 'adaptive', 'difficulty': difficulty
+    })
+    assert response.status_code == 400
+
+
+def test_negative_limit_serves_the_whole_bank(client):
+    response = client.get('/quiz', query_string={
+        'subject': 'Python', 'level': 'Easy', 'limit': -3,
+        'order': 'adaptive', 'difficulty': '0.5'
+    })
+    assert response.status_code == 200
+
+
+def test_explicit_difficulty_serves_a_quiz(client):
+    response = client.get('/quiz', query_string={
+        'subject': 'Python', 'level': 'Easy', 'limit': 5,
+        'order': 'adaptive', 'difficulty': '0.8'
+    })
+    assert response.status_code == 200
+
+
+def answer_history(failure_rate, correct, answered=20):
+    """Give alice `correct` of `answered` questions, each missed by
+    `failure_rate` of everyone; returns her target difficulty."""
+    user = User.query.filter_by(username='alice').one()
+    questions = Question.query.order_by(Question.id).limit(answered).all()
+
+    db.session.execute(db.insert(QuestionStats), [
+        {
+            "question_id": q.id, "subject": q.subject, "level": q.level,
+            "times_served": 100, "times_correct": round(100 * (1 - failure_rate)),
+            "difficulty_bucket": int(failure_rate * 10)
+        }
+        for q in questions
+    ])
+    attempt = QuizAttempt(
+        user_id=user.id, subject='Python', level='Easy',
+        score=correct, total_questions=answered
+    )
+    db.session.add(attempt)
+    db.session.flush()
+    db.session.execute(db.insert(QuizAnswer), [
+        {"attempt_id": attempt.id, "question_id": q.id,
+         "chosen_option": "A", "is_correct": i < correct}
+        for i, q in enumerate(questions)
+    ])
+    db.session.commit()
+    return _target_difficulty(user.id, 'Python', 'Easy')
+
+
+def test_no_history_aims_at_target_success(app):
+    with app.app_context():
+        user = User.query.filter_by(username='alice').one()
+        target = _target_difficulty(user.id, 'Python', 'Easy')
+    assert target == pytest.approx(1 - TARGET_SUCCESS)
+
+
+def test_strong_user_is_pushed_to_harder_questions(app):
+    # 90% right on questions most people get right: serve harder ones
+    with app.app_context():
+        assert answer_history(failure_rate=0.3, correct=18) > 0.5
+
+
+def test_weak_user_is_served_easier_questions(app):
+    # 40% right on average questions: serve easier ones
+    with app.app_context():
+        assert answer_history(failure_rate=0.3, correct=8) < 0.2
+
+
+def test_target_is_stable_at_target_success(app):
+    # already succeeding TARGET_SUCCESS of the time on hard questions:
+    # stay there rather than drift back to the user's own miss rate
+    with app.app_context():
+        target = answer_history(failure_rate=0.7, correct=14)
+    assert target == pytest.approx(0.7, abs=0.05)
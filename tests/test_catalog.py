@@ -0,0 +1,37 @@
+"""The question catalog is cached per app, not per process."""
+from app import create_app
+from catalog import catalog
+from models import db, init_schema, Question
+
+
+def make_app(tmp_path, name, text):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / name}",
+        'METRICS_DIR': str(tmp_path / 'metrics'),
+    })
+    with app.app_context():
+        init_schema()
+        db.session.add(Question(
+            subject='Python', level='Easy', number=1, question_text=text,
+            option_a='a', option_b='b', option_c='c', option_d='d',
+            correct_option='A'
+        ))
+        db.session.commit()
+    return app
+
+
+def test_apps_on_different_databases_do_not_share_a_catalog(tmp_path):
+    # both databases are at catalog version 0
+    first = make_app(tmp_path, 'first.db', 'From the first bank?')
+    second = make_app(tmp_path, 'second.db', 'From the second bank?')
+
+    try:
+        with first.app_context():
+            assert catalog.get_many([1])[1].question_text == 'From the first bank?'
+        with second.app_context():
+            assert catalog.get_many([1])[1].question_text == 'From the second bank?'
+    finally:
+        for app in (first, second):
+            with app.app_context():
+                db.engine.dispose()
@@ -0,0 +1,17 @@
+"""Engine options chosen for each kind of database URL."""
+from models import engine_options
+
+
+def test_sqlite_file_is_not_pinged_on_checkout():
+    options = engine_options('sqlite:////tmp/quiz.db')
+    assert 'pool_pre_ping' not in options
+    assert options['pool_size'] >= 1
+
+
+def test_sqlite_memory_keeps_its_single_connection_pool():
+    assert 'pool_size' not in engine_options('sqlite://')
+    assert 'pool_size' not in engine_options('sqlite:///:memory:')
+
+
+def test_server_database_is_pinged_on_checkout():
+    assert engine_options('postgresql://mcq@db/quiz')['pool_pre_ping']
@@ -0,0 +1,113 @@
+"""Golden tests for the MCQ tokenizer in files.py.
+
+The page-text fixtures (pages separated by form feeds) mimic what
+pdfplumber extracts: page-number footers, questions and options running
+across page breaks, options packed onto one line and "Explanation:"
+lines. python_medium_pages.txt rebuilds the source of the garbled
+records in data/python_medium.json, which the old split/findall parser
+produced from text like it.
+"""
+import glob
+import json
+import os
+import re
+
+import pytest
+
+from files import parse_mcq_stream
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(TESTS_DIR, 'fixtures')
+DATA_DIR = os.path.join(os.path.dirname(TESTS_DIR), 'data')
+
+QUESTION_MARKER = r'Question\s*\d*\s*:'
+WHAT_MARKER = r'What\s+(?:is|will|does)'
+
+
+def read_pages(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read().split('\f')
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def without_number(record):
+    return {k: v for k, v in record.items() if k != 'number'}
+
+
+def test_python_medium_page_text_matches_golden():
+    parsed = list(parse_mcq_stream(
+        read_pages('python_medium_pages.txt'), [QUESTION_MARKER]
+    ))
+    assert parsed == read_json(os.path.join(FIXTURES, 'python_medium_golden.json'))
+
+
+def test_python_medium_has_no_debris_from_neighbouring_questions():
+    parsed = list(parse_mcq_stream(
+        read_pages('python_medium_pages.txt'), [QUESTION_MARKER]
+    ))
+    for record in parsed:
+        for value in record.values():
+            assert 'Answer' not in str(value)
+            assert 'Explanation' not in str(value)
+        assert not re.search(r'\s\d+$', record['option_b'])  # page footer
+
+
+def test_linux_page_text_matches_bank_records():
+    parsed = list(parse_mcq_stream(read_pages('linux_pages.txt'), [WHAT_MARKER]))
+    bank = read_json(os.path.join(DATA_DIR, 'linux.json'))
+
+    assert [without_number(r) for r in parsed] == \
+        [without_number(bank[i]) for i in (0, 5, 2)]
+
+
+def test_unanswered_block_is_dropped_and_parser_resyncs():
+    pages = [
+        "Question 1: First?\na) w\nb) x\nc) y\nd) z\n"
+        "Question 2: Second?\na) w\nb) x\nc) y\nd) z\nAnswer: d)\n"
+    ]
+    parsed = list(parse_mcq_stream(pages, [QUESTION_MARKER]))
+    assert [r['question_text'] for r in parsed] == ['Question 2: Second?']
+    assert parsed[0]['correct_option'] == 'D'
+
+
+def _bank_files():
+    return sorted(
+        path for path in glob.glob(os.path.join(DATA_DIR, '*.json'))
+        if os.path.basename(path) != 'manifest.json'
+    )
+
+
+def _render(records):
+    """Question-bank text for `records`, one question after another."""
+    lines = []
+    for r in records:
+        lines.extend(r['question_text'].splitlines())
+        for letter in 'abcd':
+            lines.append(f"{letter}) {r['option_' + letter]}")
+        lines.append(f"Answer: {r['correct_option'].lower()})")
+        lines.append('')
+    return '\n'.join(lines)
+
+
+@pytest.mark.parametrize('path', _bank_files(), ids=os.path.basename)
+def test_clean_bank_records_round_trip(path):
+    records = [
+        r for r in read_json(path)
+        if 'question_text' in r and r['question_text'].strip()
+        and not any('Answer' in str(v) for v in r.values())
+    ]
+    if not records:
+        pytest.skip('no option_a..d records to round-trip')
+
+    parsed = list(parse_mcq_stream([_render(records)]))
+
+    def canonical(r):
+        return tuple(' '.join(r[k].split()) for k in (
+            'question_text', 'option_a', 'option_b', 'option_c', 'option_d'
+        )) + (r['correct_option'].strip().upper()[:1],)
+
+    assert [canonical(r) for r in parsed] == [canonical(r) for r in records]
@@ -0,0 +1,68 @@
+"""iter_pages: cached and freshly extracted pages come out in order."""
+import os
+import sys
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import files
+
+PAGE_COUNT = 12
+
+
+@pytest.fixture
+def pdf(tmp_path, monkeypatch):
+    """A fake 12-page PDF; records which pages were extracted."""
+    extracted = []
+
+    class Page:
+        def __init__(self, page_no):
+            self.page_no = page_no
+
+        def extract_text(self, **kwargs):
+            extracted.append(self.page_no)
+            return f"page{self.page_no}"
+
+    class Pdf:
+        pages = [Page(n) for n in range(PAGE_COUNT)]
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setitem(
+        sys.modules, 'pdfplumber', types.SimpleNamespace(open=lambda path: Pdf())
+    )
+    # threads share the stubbed module; worker processes might not
+    monkeypatch.setattr(files, 'ProcessPoolExecutor', ThreadPoolExecutor)
+
+    path = tmp_path / 'bank.pdf'
+    path.write_bytes(b'%PDF-fake')
+    return str(path), str(tmp_path / 'cache'), extracted
+
+
+def test_cold_cache_extracts_every_page(pdf):
+    path, cache_dir, extracted = pdf
+
+    pages = list(files.iter_pages(path, workers=2, cache_dir=cache_dir))
+
+    assert pages == [f"page{n}" for n in range(PAGE_COUNT)]
+    assert sorted(extracted) == list(range(PAGE_COUNT))
+
+
+def test_gaps_in_the_cache_keep_page_order(pdf):
+    path, cache_dir, extracted = pdf
+    list(files.iter_pages(path, workers=2, cache_dir=cache_dir))
+    extracted.clear()
+
+    pdf_cache = os.path.join(cache_dir, files.pdf_hash(path))
+    for page_no in (0, 5, 6, 11):
+        os.unlink(files._page_cache_path(pdf_cache, page_no))
+
+    pages = list(files.iter_pages(path, workers=2, cache_dir=cache_dir))
+
+    assert pages == [f"page{n}" for n in range(PAGE_COUNT)]
+    assert sorted(extracted) == [0, 5, 6, 11]
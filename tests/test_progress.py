@@ -0,0 +1,32 @@
+"""Progress rollups across epochs."""
+from models import db, User, UserProgress
+from progress import record_progress
+
+
+def rollup(user_id):
+    row = UserProgress.query.filter_by(
+        user_id=user_id, subject='Python', level='Easy'
+    ).one()
+    return row.epoch, row.attempts, row.total_answered, row.total_correct
+
+
+def test_new_epoch_replaces_the_old_rollup(app):
+    with app.app_context():
+        user_id = User.query.filter_by(username='alice').one().id
+        record_progress(user_id, 0, 'Python', 'Easy', 3, 5)
+        record_progress(user_id, 1, 'Python', 'Easy', 0, 1)
+        db.session.commit()
+
+        assert rollup(user_id) == (1, 1, 1, 0)
+
+
+def test_stale_epoch_submission_is_ignored(app):
+    # graded before a progress reset, written (journal replay, another
+    # worker's queue) after it
+    with app.app_context():
+        user_id = User.query.filter_by(username='alice').one().id
+        record_progress(user_id, 1, 'Python', 'Easy', 0, 1)
+        record_progress(user_id, 0, 'Python', 'Easy', 1, 1)
+        db.session.commit()
+
+        assert rollup(user_id) == (1, 1, 1, 0)
@@ -0,0 +1,24 @@
+"""File discovery against the question bank shipped in instance/quiz.db."""
+import os
+import sqlite3
+
+from questions_loader import discover_files
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_data_files_feed_the_shipped_banks():
+    # a file named differently from its bank would load a parallel copy
+    db = sqlite3.connect(
+        f"file:{os.path.join(ROOT, 'instance', 'quiz.db')}?mode=ro", uri=True
+    )
+    try:
+        shipped = set(db.execute("SELECT DISTINCT subject, level FROM question"))
+    finally:
+        db.close()
+
+    discovered = {
+        (subject, level)
+        for subject, level, _ in discover_files(os.path.join(ROOT, 'data'))
+    }
+    assert discovered <= shipped, discovered - shipped
@@ -0,0 +1,33 @@
+"""GET /quiz question selection."""
+import re
+
+import pytest
+
+from conftest import BANK_SIZE
+from models import QuizSession
+
+
+def served_ids(response):
+    ids = re.search(r'name="question_ids"\s+value="([^"]*)"', response.text)
+    return ids.group(1).split(',')
+
+
+@pytest.mark.parametrize('order', ['random', 'number'])
+def test_negative_limit_serves_the_whole_bank(app, client, order):
+    # like limit=0 ("All"): SQLite read LIMIT -3 as no limit
+    response = client.get('/quiz', query_string={
+        'subject': 'Python', 'level': 'Easy', 'limit': -3, 'order': order
+    })
+    assert response.status_code == 200
+    response.get_data()  # streamed page
+
+    with app.app_context():
+        assert len(QuizSession.query.one().ids()) == BANK_SIZE
+
+
+def test_limit_samples_that_many_questions(client):
+    response = client.get('/quiz', query_string={
+        'subject': 'Python', 'level': 'Easy', 'limit': 7
+    })
+    assert response.status_code == 200
+    assert len(set(served_ids(response))) == 7
@@ -0,0 +1,84 @@
+"""Paged "All" quizzes: chunks are graded once each, strictly in order."""
+import threading
+
+from conftest import PASSWORD
+from models import QuizAnswer, QuizAttempt, QuizSession, UserProgress
+
+
+def start_session(client):
+    response = client.get('/quiz', query_string={
+        'subject': 'Python', 'level': 'Easy', 'order': 'number'
+    })
+    assert response.status_code == 200
+    response.get_data()  # streamed page
+
+
+def first_chunk(app):
+    with app.app_context():
+        quiz_session = QuizSession.query.one()
+        return quiz_session.id, quiz_session.ids()[:10]
+
+
+def post_chunk(client, session_id, offset, ids, chosen='A'):
+    return client.post(
+        f'/quiz/session/{session_id}/answers',
+        json={'offset': offset, 'answers': {str(qid): chosen for qid in ids}}
+    )
+
+
+def login(app):
+    client = app.test_client()
+    client.post('/login', data={'username_or_email': 'alice', 'password': PASSWORD})
+    return client
+
+
+def test_resent_chunk_is_rejected(app, client):
+    start_session(client)
+    session_id, ids = first_chunk(app)
+
+    assert post_chunk(client, session_id, 0, ids).status_code == 200
+    resent = post_chunk(client, session_id, 0, ids)
+    assert resent.status_code == 409
+    assert resent.get_json()['graded'] == 10
+
+    with app.app_context():
+        assert QuizAnswer.query.count() == 10
+
+
+def test_concurrent_duplicate_chunks_are_graded_once(app, client):
+    start_session(client)
+    session_id, ids = first_chunk(app)
+
+    clients = [login(app), login(app)]
+    barrier = threading.Barrier(len(clients))
+    statuses = []
+
+    def post(c):
+        barrier.wait()
+        statuses.append(post_chunk(c, session_id, 0, ids).status_code)
+
+    threads = [threading.Thread(target=post, args=(c,)) for c in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(statuses) == [200, 409]
+    with app.app_context():
+        assert QuizAttempt.query.count() == 1
+        assert QuizAnswer.query.count() == 10
+        progress = UserProgress.query.one()
+        assert (progress.attempts, progress.total_answered) == (1, 10)
+
+
+def test_malformed_payloads_are_rejected(app, client):
+    start_session(client)
+    session_id, ids = first_chunk(app)
+    url = f'/quiz/session/{session_id}/answers'
+
+    for payload in ([1, 2], {'offset': 0, 'answers': ['A']},
+                    {'offset': '0', 'answers': {}}, {'answers': {}}):
+        assert client.post(url, json=payload).status_code == 400
+
+    with app.app_context():
+        assert QuizSession.query.one().graded == 0
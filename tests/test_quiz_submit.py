@@ -0,0 +1,70 @@
+"""POST /quiz must cost a fixed number of statements, whatever its size."""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from models import db, Question, QuizAnswer, QuizAttempt, UserProgress
+
+# catalog version check, user epoch, attempt insert, progress upsert,
+# answers executemany, question_stats executemany
+SUBMIT_STATEMENT_BUDGET = 6
+
+
+@contextmanager
+def count_statements(app):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def question_ids(app, count):
+    with app.app_context():
+        return [qid for (qid,) in db.session.query(Question.id)
+                .order_by(Question.id).limit(count)]
+
+
+def submit(client, ids, chosen='A'):
+    form = {
+        'subject': 'Python',
+        'level': 'Easy',
+        'question_ids': ','.join(str(qid) for qid in ids),
+    }
+    form.update({f'q_{qid}': chosen for qid in ids})
+    return client.post('/quiz', data=form)
+
+
+def test_submit_statement_count_does_not_grow_with_size(app, client):
+    # warm the catalog so neither measured request pays for loading it
+    client.get('/')
+    ids = question_ids(app, 51)
+
+    with count_statements(app) as one:
+        assert submit(client, ids[:1]).status_code == 200
+    with count_statements(app) as fifty:
+        assert submit(client, ids[1:]).status_code == 200
+
+    assert len(one) == len(fifty), fifty
+    assert len(fifty) <= SUBMIT_STATEMENT_BUDGET, fifty
+
+
+def test_submit_writes_attempt_answers_and_progress(app, client):
+    ids = question_ids(app, 10)
+    response = submit(client, ids)
+    assert response.status_code == 200
+
+    with app.app_context():
+        attempt = QuizAttempt.query.one()
+        assert (attempt.score, attempt.total_questions) == (10, 10)
+        assert QuizAnswer.query.filter_by(attempt_id=attempt.id).count() == 10
+
+        progress = UserProgress.query.one()
+        assert (progress.attempts, progress.total_answered) == (1, 10)
@@ -0,0 +1,182 @@
+"""Write-behind: queued POST /quiz, journal replay and the depth gauge."""
+import glob
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import metrics
+from app import create_app
+from models import (
+    db, init_schema, Question, QuizAnswer, QuizAttempt, UserProgress
+)
+from write_behind import METRICS_ROUTE, new_submission, write_behind
+
+SUBMISSIONS = 4
+
+
+def journal(app, name, submissions):
+    journal_dir = app.config['WRITE_BEHIND_JOURNAL_DIR']
+    os.makedirs(journal_dir, exist_ok=True)
+    path = os.path.join(journal_dir, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        for submission in submissions:
+            f.write(json.dumps(submission) + '\n')
+    return path
+
+
+def flusher(app):
+    return app.extensions['write_behind']
+
+
+def test_recover_replays_an_orphaned_journal(app):
+    submission = new_submission(1, 0, 'Python', 'Easy', 0, 0, [])
+    path = journal(app, 'journal-1-dead.jsonl', [submission])
+
+    flusher(app)._recover()
+
+    assert not os.path.exists(path)
+    with app.app_context():
+        assert QuizAttempt.query.filter_by(
+            submission_id=submission['id']
+        ).count() == 1
+
+
+def test_recover_skips_a_journal_another_worker_took(app, monkeypatch):
+    path = journal(app, 'journal-1-dead.jsonl', [])
+    listed = os.listdir(app.config['WRITE_BEHIND_JOURNAL_DIR'])
+    os.unlink(path)  # replayed by another worker after we listed it
+
+    monkeypatch.setattr(os, 'listdir', lambda _: listed)
+    flusher(app)._recover()
+
+
+def test_recover_tolerates_a_journal_unlinked_under_it(app, monkeypatch):
+    journal(app, 'journal-1-dead.jsonl', [])
+    unlink = os.unlink
+
+    def racing_unlink(path):
+        unlink(path)  # another worker got there first
+        unlink(path)
+
+    monkeypatch.setattr(os, 'unlink', racing_unlink)
+    flusher(app)._recover()
+
+
+class Stop(Exception):
+    pass
+
+
+def test_run_survives_a_failed_recovery(app, monkeypatch):
+    writer = flusher(app)
+
+    def broken():
+        raise OSError('journal dir unreadable')
+
+    def get(*args, **kwargs):
+        raise Stop  # reached the flush loop
+
+    monkeypatch.setattr(writer, '_recover', broken)
+    monkeypatch.setattr(writer._queue, 'get', get)
+
+    with pytest.raises(Stop):
+        writer._run()
+
+
+def test_drained_queue_is_flushed_immediately(app, monkeypatch):
+    writer = flusher(app)
+    monkeypatch.setattr(metrics, '_last_flush', float('inf'))  # rate limited
+
+    writer._queue.put_nowait({})
+    writer._report_depth()
+    writer._queue.get_nowait()
+    writer._report_depth()
+
+    depth = metrics.merged_snapshot()['gauges']['mcq_write_behind_queue_depth']
+    assert depth[METRICS_ROUTE] == 0
+
+
+def test_each_app_has_its_own_queue(app, tmp_path):
+    app.config['WRITE_BEHIND'] = True
+    # created last, as a second create_app() in the same process would be
+    other = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'other.db'}",
+        'METRICS_DIR': str(tmp_path / 'metrics'),
+        'WRITE_BEHIND': False,
+    })
+    with other.app_context():
+        init_schema()
+
+    try:
+        with other.app_context():
+            assert not write_behind.enabled
+        with app.app_context():
+            assert write_behind.enabled
+            write_behind.submit(
+                new_submission(1, 0, 'Python', 'Easy', 1, 1, [(1, 'A', True)])
+            )
+            assert write_behind.drain()
+            assert QuizAttempt.query.count() == 1
+        with other.app_context():
+            assert QuizAttempt.query.count() == 0
+    finally:
+        with other.app_context():
+            db.engine.dispose()
+
+
+def test_post_quiz_is_written_behind_in_batches(app, client):
+    app.config['WRITE_BEHIND'] = True
+    queue = flusher(app)
+    flush = queue._flush
+    release = threading.Event()
+    batches = []
+
+    def held_flush(batch):
+        release.wait(10)
+        batches.append(len(batch))
+        flush(batch)
+
+    queue._flush = held_flush
+
+    with app.app_context():
+        ids = [qid for (qid,) in db.session.query(Question.id)
+               .order_by(Question.id).limit(SUBMISSIONS * 5)]
+    for n in range(SUBMISSIONS):
+        chunk = ids[n * 5:(n + 1) * 5]
+        form = {
+            'subject': 'Python', 'level': 'Easy',
+            'question_ids': ','.join(map(str, chunk)),
+        }
+        form.update({f'q_{qid}': 'A' for qid in chunk})
+        assert client.post('/quiz', data=form).status_code == 200
+
+    # answered, journaled, but nothing committed yet
+    [path] = glob.glob(os.path.join(queue.journal_dir, 'journal-*.jsonl'))
+    with open(path, encoding='utf-8') as f:
+        assert len(f.readlines()) == SUBMISSIONS
+    with app.app_context():
+        assert QuizAttempt.query.count() == 0
+
+    release.set()
+    with app.app_context():
+        assert write_behind.drain()
+
+        assert QuizAttempt.query.count() == SUBMISSIONS
+        assert QuizAnswer.query.count() == SUBMISSIONS * 5
+        progress = UserProgress.query.one()
+        assert (progress.attempts, progress.total_answered,
+                progress.total_correct) == (SUBMISSIONS, SUBMISSIONS * 5,
+                                            SUBMISSIONS * 5)
+
+    # submissions that queued up behind the held flush went in together
+    assert sum(batches) == SUBMISSIONS
+    assert len(batches) < SUBMISSIONS
+
+    # the journal is truncated once the queue drains
+    deadline = time.monotonic() + 5
+    while os.path.getsize(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert os.path.getsize(path) == 0
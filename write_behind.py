@@ -0,0 +1,338 @@
+"""Write-behind persistence for graded quiz submissions (optional).
+
+With WRITE_BEHIND=1, POST /quiz grades in memory, appends the submission
+to this worker's journal, queues it and renders the result straight
+away. A background thread drains the bounded queue and group-commits up
+to MAX_BATCH submissions per transaction, waiting at most MAX_DELAY for
+a batch to fill, so bursts cost one SQLite write transaction per batch
+instead of one per submit. When the queue is full the submission is
+written inline instead, as it is with write-behind off.
+
+Each worker appends to its own `journal-<pid>-<token>.jsonl` and holds
+an flock on it. The journal is truncated whenever the queue drains. A
+worker that finds an unlocked journal (its owner died) replays it on
+start. Replays are idempotent because every submission carries a unique
+QuizAttempt.submission_id.
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import current_app, request
+from sqlalchemy.exc import IntegrityError
+
+import metrics
+from catalog import catalog
+from models import db, QuizAttempt, QuizAnswer
+from progress import record_progress, record_question_stats
+
+QUEUE_SIZE = int(os.environ.get('WRITE_BEHIND_QUEUE_SIZE', 1000))
+MAX_BATCH = int(os.environ.get('WRITE_BEHIND_MAX_BATCH', 200))
+MAX_DELAY = float(os.environ.get('WRITE_BEHIND_MAX_DELAY_MS', 200)) / 1000
+# fsync every journal append (survives power loss, not just a crash)
+FSYNC = os.environ.get('WRITE_BEHIND_FSYNC') == '1'
+RETRY_DELAY = 1.0
+DRAIN_TIMEOUT = 10.0
+
+METRICS_ROUTE = 'write_behind'
+
+log = logging.getLogger('mcq.write_behind')
+
+
+def new_submission(user_id, epoch, subject, level, score, total, answers):
+    """A graded POST /quiz submission, as journaled and queued.
+
+    `answers` is a list of (question_id, chosen_option, is_correct).
+    """
+    return {
+        "id": uuid.uuid4().hex,
+        "user_id": user_id,
+        "epoch": epoch,
+        "subject": subject,
+        "level": level,
+        "score": score,
+        "total": total,
+        "created_at": datetime.utcnow().isoformat(),
+        "answers": [list(a) for a in answers],
+    }
+
+
+def write_submissions(submissions, skip_stored=True):
+    """Persist submissions in the current transaction and commit.
+
+    With `skip_stored`, submissions already stored (same id) are skipped,
+    so a journal can be replayed safely; a submission written inline
+    straight after grading is new and doesn't need that lookup. Attempts
+    are inserted with one ORM flush, answers with one executemany.
+    """
+    stored = set()
+    if skip_stored:
+        ids = [s["id"] for s in submissions]
+        stored = {sid for (sid,) in db.session.query(QuizAttempt.submission_id)
+                  .filter(QuizAttempt.submission_id.in_(ids))}
+
+    pending = []
+    for s in submissions:
+        if s["id"] in stored:
+            continue
+        stored.add(s["id"])
+        attempt = QuizAttempt(
+            submission_id=s["id"],
+            user_id=s["user_id"],
+            epoch=s["epoch"],
+            subject=s["subject"],
+            level=s["level"],
+            score=s["score"],
+            total_questions=s["total"],
+            created_at=datetime.fromisoformat(s["created_at"])
+        )
+        db.session.add(attempt)
+        pending.append((s, attempt))
+
+    if not pending:
+        return 0
+    db.session.flush()
+
+    questions = catalog.get_many(
+        {qid for s, _ in pending for qid, _, _ in s["answers"]}
+    )
+    answer_rows = []
+    graded = []
+
+    for s, attempt in pending:
+        for qid, chosen, is_correct in s["answers"]:
+            answer_rows.append({
+                "attempt_id": attempt.id,
+                "question_id": qid,
+                "chosen_option": chosen,
+                "is_correct": is_correct
+            })
+            if qid in questions:
+                graded.append((questions[qid], is_correct))
+
+        record_progress(
+            s["user_id"], s["epoch"], s["subject"], s["level"],
+            s["score"], len(s["answers"])
+        )
+
+    if answer_rows:
+        db.session.execute(db.insert(QuizAnswer), answer_rows)
+    record_question_stats(graded)
+    db.session.commit()
+    return len(pending)
+
+
+class WriteBehind:
+    """Flask extension: submit() and drain() go to the current app's queue."""
+
+    def init_app(self, app):
+        app.config.setdefault(
+            'WRITE_BEHIND', os.environ.get('WRITE_BEHIND') == '1'
+        )
+        app.config.setdefault(
+            'WRITE_BEHIND_JOURNAL_DIR',
+            os.environ.get('WRITE_BEHIND_JOURNAL_DIR')
+            or os.path.join(app.instance_path, 'write-behind')
+        )
+        app.extensions['write_behind'] = SubmissionQueue(app)
+
+    @property
+    def enabled(self):
+        return current_app.config['WRITE_BEHIND']
+
+    def submit(self, submission):
+        """Queue a graded submission, or write it now if that's not possible."""
+        if not self.enabled:
+            write_submissions([submission], skip_stored=False)
+            return
+        current_app.extensions['write_behind'].submit(submission)
+
+    def drain(self, timeout=DRAIN_TIMEOUT):
+        """Wait (up to `timeout`) until everything queued is committed."""
+        return current_app.extensions['write_behind'].drain(timeout)
+
+
+class SubmissionQueue:
+    """One app's submission queue, journal and group-commit flusher."""
+
+    def __init__(self, app):
+        self.app = app
+        self.journal_dir = app.config['WRITE_BEHIND_JOURNAL_DIR']
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._journal = None
+        self._reported_depth = None
+
+    def submit(self, submission):
+        """Queue a graded submission, or write it now if the queue is full."""
+        self._start()
+        line = json.dumps(submission, separators=(',', ':')) + '\n'
+
+        with self._lock:
+            try:
+                self._queue.put_nowait(submission)
+            except queue.Full:
+                queued = False
+            else:
+                queued = True
+                os.write(self._journal, line.encode('utf-8'))
+                if FSYNC:
+                    os.fsync(self._journal)
+
+        if not queued:
+            metrics.registry.inc(
+                'mcq_write_behind_overflow_total',
+                request.endpoint or METRICS_ROUTE
+            )
+            write_submissions([submission], skip_stored=False)
+        self._report_depth()
+
+    def drain(self, timeout=DRAIN_TIMEOUT):
+        """Wait (up to `timeout`) until everything queued is committed."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    # ----- flusher -----
+
+    def _start(self):
+        # lazily, in the worker itself: threads don't survive a fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            os.makedirs(self.journal_dir, exist_ok=True)
+            path = os.path.join(
+                self.journal_dir,
+                f'journal-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl'
+            )
+            self._journal = os.open(
+                path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600
+            )
+            fcntl.flock(self._journal, fcntl.LOCK_EX)
+            self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+            self._pid = os.getpid()
+
+            threading.Thread(
+                target=self._run, name='write-behind', daemon=True
+            ).start()
+            atexit.register(self.drain)
+
+    def _run(self):
+        try:
+            self._recover()
+        except Exception:
+            # the journals stay on disk for the next worker to replay
+            log.exception('write-behind journal recovery failed')
+
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + MAX_DELAY
+            while len(batch) < MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._flush(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+            with self._lock:
+                if self._queue.empty():
+                    os.ftruncate(self._journal, 0)
+            self._report_depth()
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+
+        with self.app.app_context():
+            while True:
+                try:
+                    write_submissions(batch)
+                    break
+                except IntegrityError:
+                    # one bad submission (e.g. its user was deleted) must
+                    # not hold the rest back: retry one by one, drop it
+                    db.session.rollback()
+                    if len(batch) == 1:
+                        log.exception('dropping submission %s', batch[0]["id"])
+                        break
+                    for submission in batch:
+                        self._flush([submission])
+                    return
+                except Exception:
+                    db.session.rollback()
+                    log.exception('write-behind flush failed; retrying')
+                    time.sleep(RETRY_DELAY)
+
+        metrics.registry.observe(
+            'mcq_write_behind_flush_seconds', METRICS_ROUTE,
+            time.perf_counter() - started
+        )
+        metrics.registry.observe(
+            'mcq_write_behind_batch_size', METRICS_ROUTE, len(batch)
+        )
+
+    def _recover(self):
+        """Replay journals left behind by workers that died."""
+        for name in sorted(os.listdir(self.journal_dir)):
+            if not (name.startswith('journal-') and name.endswith('.jsonl')):
+                continue
+            path = os.path.join(self.journal_dir, name)
+
+            try:
+                fd = os.open(path, os.O_RDWR)
+            except FileNotFoundError:
+                continue  # another worker replayed it first
+            with os.fdopen(fd, encoding='utf-8') as f:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # a live worker's journal (or our own)
+                if os.fstat(fd).st_nlink == 0:
+                    continue  # replayed and unlinked while we waited
+
+                submissions = []
+                for line in f:
+                    try:
+                        submissions.append(json.loads(line))
+                    except ValueError:
+                        pass  # torn final line from the crash
+
+                for i in range(0, len(submissions), MAX_BATCH):
+                    self._flush(submissions[i:i + MAX_BATCH])
+                if submissions:
+                    log.warning('replayed %d submissions from %s',
+                                len(submissions), name)
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+    def _report_depth(self):
+        depth = self._queue.qsize()
+        metrics.registry.set('mcq_write_behind_queue_depth', METRICS_ROUTE, depth)
+
+        # flush() is rate limited; a queue that just drained (or just
+        # started to back up) must not wait for the next request to show
+        emptied = (depth == 0) != (self._reported_depth == 0)
+        self._reported_depth = depth
+        metrics.flush(force=emptied)
+
+
+write_behind = WriteBehind()